@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+
+from pympi import Intervals
+from pympi.Elan import Eaf
+
+VERSION = '1.69'
+
+
+def get_intervals(tier):
+    """Give the sorted annotations of a tier in milliseconds. A tier is
+    either an IntervalTier of a :class:`pympi.Praat.TextGrid`, in which case
+    the empty intervals are seen as gaps, or a tuple of an
+    :class:`pympi.Elan.Eaf` object and a tier name. This allows comparing
+    tiers of different files and formats.
+
+    :param tier: Tier of the form: ``pympi.Praat.Tier`` or ``(eaf_obj,
+        tier_name)``.
+    :returns: List of the form: ``[(begin, end, value)]``.
+    :raises KeyError: If the Eaf tier is non existent.
+    :raises Exception: If the Praat tier is not an IntervalTier.
+    """
+    if isinstance(tier, tuple):
+        eaf_obj, name = tier
+        return sorted(a[:3] for a in eaf_obj.get_annotation_data_for_tier(name)
+                      if a[0] is not None and a[1] is not None)
+    if tier.tier_type != 'IntervalTier':
+        raise Exception('Tiertype must be IntervalTier.')
+    return [(i[0]*1000.0, i[1]*1000.0, i[2])
+            for i in tier.get_intervals(True) if i[2].strip()]
+
+
+def get_segments(intervals, start, end):
+    """Give the piecewise constant labelling of ``[start, end]`` by
+    intervals, gaps get the label ``None``. When intervals overlap the most
+    recently started interval takes precedence, in the same way as
+    :func:`pympi.Intervals.frames`, so the intervals are ordered by begin and
+    then by end.
+
+    :param list intervals: Intervals of the form: ``[(begin, end, value)]``.
+    :param start: Start time.
+    :param end: End time.
+    :returns: Sorted list of adjacent segments of the form: ``[(begin, end,
+        value)]``.
+    """
+    segments = []
+
+    def emit(begin, end2, value):
+        begin, end2 = max(begin, start), min(end2, end)
+        if begin < end2:
+            segments.append((begin, end2, value))
+    # Stack of the intervals that are still running with decreasing ends,
+    # the top is the most recently started one and gives the label
+    stack = []
+    current = start
+    for begin, end2, value in sorted(intervals, key=lambda x: (x[0], x[1])):
+        while stack and stack[-1][0] <= begin:
+            emit(current, stack[-1][0], stack[-1][1])
+            current = max(current, stack.pop()[0])
+        emit(current, begin, stack[-1][1] if stack else None)
+        current = max(current, begin)
+        while stack and stack[-1][0] <= end2:
+            stack.pop()
+        stack.append((end2, value))
+    while stack:
+        emit(current, stack[-1][0], stack[-1][1])
+        current = max(current, stack.pop()[0])
+    emit(current, end, None)
+    return segments
+
+
+def sweep(tiers, start=None, end=None):
+    """Sweep over the boundaries of multiple tiers at once.
+
+    :param list tiers: Tiers, see :func:`get_intervals` for the format.
+    :param start: Start time in ms, if ``None`` the first begin is used.
+    :param end: End time in ms, if ``None`` the last end is used.
+    :yields: Tuples of the form: ``(begin, end, values)`` where values has
+        the label of every tier for that stretch of time.
+    """
+    tiers = [get_intervals(t) for t in tiers]
+    if start is None:
+        start = min([t[0][0] for t in tiers if t] or [0])
+    if end is None:
+        end = max([max(i[1] for i in t) for t in tiers if t] or [0])
+    segments = [get_segments(t, start, end) for t in tiers]
+    index = [0]*len(segments)
+    current = start
+    while current < end:
+        stop = min(s[i][1] for s, i in zip(segments, index))
+        yield (current, stop, tuple(s[i][2] for s, i in zip(segments, index)))
+        current = stop
+        for k, s in enumerate(segments):
+            if s[index[k]][1] == stop:
+                index[k] += 1
+
+
+def contingency(tier1, tier2, start=None, end=None, hop=None):
+    """Give the contingency table of two tiers over time. By default the
+    table is computed exactly from the boundaries and weighted by duration,
+    when a hop size is given frames are counted instead. In both cases
+    overlapping annotations within a tier are resolved in favour of the most
+    recently started one, see :func:`get_segments`.
+
+    :param tier1: First tier, see :func:`get_intervals` for the format.
+    :param tier2: Second tier, see :func:`get_intervals` for the format.
+    :param start: Start time in ms, if ``None`` the first begin is used.
+    :param end: End time in ms, if ``None`` the last end is used.
+    :param hop: Hop size in ms, if ``None`` durations are used. This requires
+        :mod:`numpy`.
+    :returns: Dictionary of the form: ``{(value1, value2) -> weight}`` where
+        ``None`` is the value for no annotation.
+    """
+    table = {}
+    if hop is None:
+        for begin, end2, values in sweep([tier1, tier2], start, end):
+            table[values] = table.get(values, 0) + end2 - begin
+        return table
+    intervals = [get_intervals(tier1), get_intervals(tier2)]
+    if start is None:
+        start = min([t[0][0] for t in intervals if t] or [0])
+    if end is None:
+        end = max([max(i[1] for i in t) for t in intervals if t] or [0])
+    matrix, vocabulary = Intervals.frames(intervals, start, end, hop)
+    for (code1, code2), count in zip(*_count_rows(matrix)):
+        key = (vocabulary[code1], vocabulary[code2])
+        table[key] = table.get(key, 0) + count
+    return table
+
+
+def _count_rows(matrix):
+    """Count the unique rows of a numpy matrix.
+
+    :param numpy.ndarray matrix: The matrix.
+    :returns: Tuple of the form: ``(rows, counts)``.
+    """
+    import numpy
+    rows, counts = numpy.unique(matrix, axis=0, return_counts=True)
+    return [tuple(int(c) for c in r) for r in rows], counts.tolist()
+
+
+def kappa(table):
+    """Compute Cohen's kappa from a contingency table.
+
+    :param dict table: Contingency table, see :func:`contingency`.
+    :returns: Cohen's kappa, ``1.0`` when the expected agreement is already
+        perfect and ``0.0`` for an empty table.
+    """
+    total = float(sum(table.values()))
+    if not total:
+        return 0.0
+    rows, cols = {}, {}
+    for (a, b), weight in table.items():
+        rows[a] = rows.get(a, 0) + weight
+        cols[b] = cols.get(b, 0) + weight
+    po = sum(w for (a, b), w in table.items() if a == b)/total
+    pe = sum(rows[k]*cols.get(k, 0) for k in rows)/total/total
+    return 1.0 if pe == 1 else (po-pe)/(1-pe)
+
+
+def cohen_kappa(tier1, tier2, start=None, end=None, hop=None):
+    """Compute Cohen's kappa between two tiers over time, no annotation is
+    seen as a category as well. See :func:`contingency` for the parameters.
+
+    :returns: Cohen's kappa.
+    """
+    return kappa(contingency(tier1, tier2, start, end, hop))
+
+
+def fleiss_kappa(tiers, start=None, end=None):
+    """Compute Fleiss' kappa between multiple tiers over time, weighted by
+    duration. No annotation is seen as a category as well.
+
+    :param list tiers: Tiers, see :func:`get_intervals` for the format.
+    :param start: Start time in ms, if ``None`` the first begin is used.
+    :param end: End time in ms, if ``None`` the last end is used.
+    :returns: Fleiss' kappa, ``1.0`` when the expected agreement is already
+        perfect and ``0.0`` when there is no time to compare.
+    :raises ValueError: If less than two tiers are given.
+    """
+    if len(tiers) < 2:
+        raise ValueError('At least two tiers are needed')
+    n = len(tiers)
+    total = 0.0
+    agreement = 0.0
+    proportions = {}
+    for begin, end2, values in sweep(tiers, start, end):
+        duration = end2 - begin
+        counts = {}
+        for value in values:
+            counts[value] = counts.get(value, 0) + 1
+        for value, count in counts.items():
+            proportions[value] = proportions.get(value, 0) + count*duration
+        agreement += duration*(sum(c*c for c in counts.values())-n) /\
+            float(n*(n-1))
+        total += duration
+    if not total:
+        return 0.0
+    po = agreement/total
+    pe = sum((p/(total*n))**2 for p in proportions.values())
+    return 1.0 if pe == 1 else (po-pe)/(1-pe)
+
+
+def event_agreement(tier1, tier2, tolerance=0, values=False):
+    """Compute event based agreement where two annotations match when both
+    their onsets and offsets are within a tolerance. Every annotation is
+    matched at most once, greedily in time order.
+
+    :param tier1: Reference tier, see :func:`get_intervals` for the format.
+    :param tier2: Compared tier, see :func:`get_intervals` for the format.
+    :param tolerance: Maximal onset and offset difference in ms.
+    :param bool values: Flag to also require equal values.
+    :returns: Dictionary of the form: ``{'matches', 'precision', 'recall',
+        'f1'}`` where precision and recall are relative to the first tier.
+    """
+    a, b = get_intervals(tier1), get_intervals(tier2)
+    used = [False]*len(b)
+    matches = j = 0
+    for begin, end, value in a:
+        while j < len(b) and (used[j] or b[j][0] < begin-tolerance):
+            j += 1
+        k = j
+        while k < len(b) and b[k][0] <= begin+tolerance:
+            if not used[k] and abs(b[k][1]-end) <= tolerance and\
+                    (not values or b[k][2] == value):
+                used[k] = True
+                matches += 1
+                break
+            k += 1
+    precision = matches/float(len(b)) if b else 0.0
+    recall = matches/float(len(a)) if a else 0.0
+    f1 = 2*precision*recall/(precision+recall) if precision+recall else 0.0
+    return {'matches': matches, 'precision': precision, 'recall': recall,
+            'f1': f1}
+
+
+class FileContingency:
+    """Picklable function giving the contingency table of two tiers in an
+    Eaf file, used by :func:`batch_kappa`.
+
+    :var str tier1: Name of the first tier.
+    :var str tier2: Name of the second tier.
+    :var hop: Hop size in ms or ``None``.
+    """
+    def __init__(self, tier1, tier2, hop=None):
+        self.tier1 = tier1
+        self.tier2 = tier2
+        self.hop = hop
+
+    def __call__(self, file_path):
+        eaf_obj = Eaf(file_path, tiers=[self.tier1, self.tier2])
+        return {file_path: contingency((eaf_obj, self.tier1),
+                                       (eaf_obj, self.tier2), hop=self.hop)}
+
+
+def batch_kappa(file_paths, tier1, tier2, hop=None, processes=None,
+                progress=None):
+    """Compute Cohen's kappa between two tiers for every file of a corpus in
+    parallel, see :func:`pympi.Corpus.map_reduce`.
+
+    :param list file_paths: Paths of the Eaf files.
+    :param str tier1: Name of the first tier.
+    :param str tier2: Name of the second tier.
+    :param hop: Hop size in ms, if ``None`` durations are used.
+    :param int processes: Number of worker processes, if ``None`` the number
+        of cpus is used.
+    :param func progress: Progress function, see
+        :func:`pympi.Corpus.map_reduce`.
+    :returns: Tuple of the form: ``(pooled_kappa, {file_path -> kappa},
+        errors)`` where the pooled kappa is computed from the summed
+        contingency tables.
+    """
+    from pympi.Corpus import map_reduce, merge
+    tables, errors, _ = map_reduce(
+        file_paths, FileContingency(tier1, tier2, hop), merge, {},
+        processes, progress=progress, loader=None)
+    pooled = {}
+    for table in tables.values():
+        for key, weight in table.items():
+            pooled[key] = pooled.get(key, 0) + weight
+    return (kappa(pooled), {k: kappa(v) for k, v in tables.items()}, errors)
@@ -0,0 +1,521 @@
+# -*- coding: utf-8 -*-
+
+import bisect
+import collections
+import multiprocessing
+import os
+import pickle
+import re
+import time
+
+from pympi.Elan import Eaf
+
+VERSION = '1.69'
+
+TOKEN = re.compile(r'\w+', flags=re.UNICODE)
+
+
+def tokenize(value, lower=True, pattern=TOKEN):
+    """Split an annotation value in word tokens, by default punctuation and
+    whitespace are discarded and the tokens are lowercased.
+
+    :param str value: Annotation value.
+    :param bool lower: Flag to lowercase the tokens.
+    :param pattern: Regular expression, string or compiled, matching a
+        token.
+    :returns: List of tokens.
+    """
+    if lower:
+        value = value.lower()
+    return re.findall(pattern, value)
+
+
+def map_reduce(file_paths, func, reduce_func, initial=None, processes=None,
+               chunksize=16, max_chunks=None, progress=None, loader=Eaf,
+               tiers=None):
+    """Apply a function to every file of a corpus on a pool of processes and
+    reduce the results. Files are sent to the workers in chunks and only a
+    bounded number of chunks is in flight at any time so the memory use does
+    not grow with the size of the corpus. Errors in a file are collected and
+    do not stop the run.
+
+    Example, count the annotations of a corpus::
+
+        def count(eaf):
+            return len(eaf.annotations)
+
+        total, errors, stats = map_reduce(paths, count, operator.add, 0)
+
+    :param list file_paths: Paths of the files.
+    :param func func: Function that is called with the loaded file and gives
+        the result for that file, it has to be picklable so it must be
+        defined on module level. When the function has a ``tiers`` attribute
+        only those tiers are loaded.
+    :param func reduce_func: Function that combines the reduced value so far
+        and the result of a file, it is called in the calling process. See
+        :func:`merge` for merging dictionaries, lists or frequencies.
+    :param initial: Initial reduced value, if ``None`` the first result is
+        used.
+    :param int processes: Number of worker processes, if ``None`` the number
+        of cpus is used. When ``1`` everything is run in the calling process.
+    :param int chunksize: Number of files sent to a worker at once.
+    :param int max_chunks: Maximum number of chunks in flight, if ``None``
+        four times the number of processes is used.
+    :param func progress: Function that is called after every chunk with a
+        dictionary of statistics, see the returned statistics.
+    :param func loader: Function that loads a file, it is called with the
+        path and, when tiers are selected, with the ``tiers`` keyword. When
+        ``None`` the function gets the path itself.
+    :param list tiers: Names of the tiers to load, this overrides the
+        ``tiers`` attribute of the function.
+    :returns: Tuple of the form: ``(reduced, errors, statistics)`` where the
+        errors are of the form: ``[(file_path, exception)]`` and the
+        statistics are of the form: ``{'files', 'total', 'errors',
+        'annotations', 'seconds', 'files_per_second',
+        'annotations_per_second'}``.
+    """
+    file_paths = list(file_paths)
+    if tiers is None:
+        tiers = getattr(func, 'tiers', None)
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    if max_chunks is None:
+        max_chunks = 4*processes
+    chunks = ((file_paths[i:i+chunksize], func, loader, tiers)
+              for i in range(0, len(file_paths), chunksize))
+    reduced = [initial, initial is not None]
+    errors = []
+    stats = {'files': 0, 'total': len(file_paths), 'errors': 0,
+             'annotations': 0, 'seconds': 0.0, 'files_per_second': 0.0,
+             'annotations_per_second': 0.0}
+    start = time.time()
+
+    def consume(results):
+        for file_path, result, error, annotations in results:
+            stats['files'] += 1
+            stats['annotations'] += annotations
+            if error is not None:
+                errors.append((file_path, error))
+            elif reduced[1]:
+                reduced[0] = reduce_func(reduced[0], result)
+            else:
+                reduced[:] = [result, True]
+        stats['errors'] = len(errors)
+        stats['seconds'] = time.time() - start
+        if stats['seconds'] > 0:
+            stats['files_per_second'] = stats['files']/stats['seconds']
+            stats['annotations_per_second'] =\
+                stats['annotations']/stats['seconds']
+        if progress is not None:
+            progress(dict(stats))
+
+    if processes == 1:
+        for chunk in chunks:
+            consume(_map_chunk(chunk))
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            pending = collections.deque()
+            for chunk in chunks:
+                pending.append(pool.apply_async(_map_chunk, (chunk,)))
+                if len(pending) >= max_chunks:
+                    consume(pending.popleft().get())
+            while pending:
+                consume(pending.popleft().get())
+        finally:
+            pool.terminate()
+    return reduced[0], errors, stats
+
+
+def merge(reduced, result):
+    """Reduce function for :func:`map_reduce` that merges the result of a
+    file into the reduced value in place, lists are extended and other values
+    such as dictionaries and :class:`Frequencies` are updated.
+
+    :param reduced: Reduced value so far.
+    :param result: Result of a file.
+    :returns: The merged value.
+    """
+    if isinstance(reduced, list):
+        reduced.extend(result)
+    else:
+        reduced.update(result)
+    return reduced
+
+
+def _map_chunk(chunk):
+    """Worker for :func:`map_reduce`, apply the function to a chunk of files.
+
+    :param tuple chunk: Tuple of the form: ``(file_paths, func, loader,
+        tiers)``.
+    :returns: List of the form: ``[(file_path, result, error,
+        annotations)]``.
+    """
+    file_paths, func, loader, tiers = chunk
+    results = []
+    for file_path in file_paths:
+        annotations = 0
+        try:
+            if loader is None:
+                obj = file_path
+            elif tiers is None:
+                obj = loader(file_path)
+            else:
+                obj = loader(file_path, tiers=tiers)
+            annotations = len(getattr(obj, 'annotations', ()))
+            results.append((file_path, func(obj), None, annotations))
+        except Exception as e:
+            try:
+                pickle.dumps(e)
+            except Exception:
+                e = Exception(repr(e))
+            results.append((file_path, None, e, annotations))
+    return results
+
+
+class Index:
+    """Persistent inverted index over the annotation values of a corpus of
+    Eaf files. Searching the index does not require reparsing any file and
+    only files that changed since the last update are reindexed.
+
+    :var list tiers: Names of the tiers that are indexed, when ``None`` all
+        tiers are indexed.
+    :var dict postings: Postings of the form: ``{token -> {(file_path, tier,
+        begin, end)}}``.
+    :var dict annotations: Tokens of the indexed annotations of the form:
+        ``{(file_path, tier, begin, end) -> [tokens]}``, where every entry is
+        a list of tokens.
+    :var dict files: Indexed files of the form: ``{file_path -> (mtime,
+        [(file_path, tier, begin, end)])}``.
+    """
+    def __init__(self, file_path=None, tiers=None):
+        """Construct either a new empty index or read one from a file.
+
+        :param str file_path: Path to read the index from, if ``None`` an
+            empty index will be created.
+        :param list tiers: Names of the tiers to index, if ``None`` all tiers
+            are indexed. Ignored when the index is read from file.
+        """
+        self.tiers = tiers
+        self.postings = {}
+        self.annotations = {}
+        self.files = {}
+        self._vocabulary = None
+        if file_path is not None:
+            with open(file_path, 'rb') as f:
+                (self.tiers, self.postings, self.annotations,
+                 self.files) = pickle.load(f)
+
+    def add_file(self, file_path, eaf_obj=None):
+        """Add a file to the index, when the file was already indexed the old
+        entries are replaced. Indexed tiers that are not in the file are
+        skipped.
+
+        :param str file_path: Path of the Eaf file.
+        :param pympi.Elan.Eaf eaf_obj: Already loaded Eaf object of the file,
+            if ``None`` the file will be parsed.
+        """
+        self.remove_file(file_path)
+        if eaf_obj is None:
+            eaf_obj = Eaf(file_path)
+        keys = []
+        tiers = eaf_obj.get_tier_names() if self.tiers is None else\
+            [t for t in self.tiers if t in eaf_obj.tiers]
+        for tier in tiers:
+            for ann in eaf_obj.get_annotation_data_for_tier(tier):
+                tokens = tokenize(ann[2])
+                if not tokens:
+                    continue
+                key = (file_path, tier, ann[0], ann[1])
+                keys.append(key)
+                self.annotations.setdefault(key, []).append(tokens)
+                for token in tokens:
+                    self.postings.setdefault(token, set()).add(key)
+        self.files[file_path] = (os.path.getmtime(file_path), keys)
+        self._vocabulary = None
+
+    def remove_file(self, file_path):
+        """Remove a file from the index, if the file is not indexed nothing
+        happens.
+
+        :param str file_path: Path of the Eaf file.
+        """
+        if file_path not in self.files:
+            return
+        for key in self.files.pop(file_path)[1]:
+            for tokens in self.annotations.pop(key, []):
+                for token in tokens:
+                    posting = self.postings.get(token)
+                    if posting is not None:
+                        posting.discard(key)
+                        if not posting:
+                            del(self.postings[token])
+        self._vocabulary = None
+
+    def update(self, file_paths, prune=True):
+        """Bring the index up to date with a list of files, only new files
+        and files that were modified since they were indexed are parsed.
+
+        :param list file_paths: Paths of the Eaf files in the corpus.
+        :param bool prune: Flag to remove indexed files that are not in
+            ``file_paths`` anymore.
+        :returns: List of the files that were (re)indexed.
+        """
+        file_paths = list(file_paths)
+        if prune:
+            for file_path in set(self.files) - set(file_paths):
+                self.remove_file(file_path)
+        changed = []
+        for file_path in file_paths:
+            if file_path not in self.files or\
+                    self.files[file_path][0] != os.path.getmtime(file_path):
+                self.add_file(file_path)
+                changed.append(file_path)
+        return changed
+
+    def get_vocabulary(self):
+        """Give all the indexed tokens.
+
+        :returns: Sorted list of tokens.
+        """
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        return self._vocabulary
+
+    def search(self, token):
+        """Give all annotations containing a token.
+
+        :param str token: Token to search for, it is normalized in the same
+            way as the annotation values.
+        :returns: Sorted list of the form: ``[(file_path, tier, begin,
+            end)]``.
+        """
+        tokens = tokenize(token)
+        if len(tokens) != 1:
+            return self.search_phrase(token)
+        return sorted(self.postings.get(tokens[0], ()))
+
+    def search_phrase(self, phrase):
+        """Give all annotations containing a sequence of tokens.
+
+        :param str phrase: Phrase to search for.
+        :returns: Sorted list of the form: ``[(file_path, tier, begin,
+            end)]``.
+        """
+        return sorted(set(m[0] for m in self._matches(tokenize(phrase))))
+
+    def search_prefix(self, prefix):
+        """Give all annotations containing a token starting with a prefix.
+
+        :param str prefix: Prefix to search for.
+        :returns: Sorted list of the form: ``[(file_path, tier, begin,
+            end)]``.
+        """
+        prefix = prefix.lower()
+        vocabulary = self.get_vocabulary()
+        hits = set()
+        for i in range(bisect.bisect_left(vocabulary, prefix),
+                       len(vocabulary)):
+            if not vocabulary[i].startswith(prefix):
+                break
+            hits.update(self.postings[vocabulary[i]])
+        return sorted(hits)
+
+    def kwic(self, phrase, width=5):
+        """Give the keyword in context concordance of a token or phrase.
+
+        :param str phrase: Token or phrase to search for.
+        :param int width: Maximum number of context tokens on each side.
+        :returns: Sorted list of the form: ``[(file_path, tier, begin, end,
+            left, match, right)]`` where ``left``, ``match`` and ``right`` are
+            space separated tokens and ``begin`` and ``end`` are the times of
+            the annotation containing the match.
+        """
+        return sorted(
+            key + (' '.join(tokens[max(0, i-width):i]),
+                   ' '.join(tokens[i:j]),
+                   ' '.join(tokens[j:j+width]))
+            for key, tokens, i, j in self._matches(tokenize(phrase)))
+
+    def to_file(self, file_path):
+        """Write the index to a file.
+
+        :param str file_path: Filepath to write to.
+        """
+        with open(file_path, 'wb') as f:
+            pickle.dump((self.tiers, self.postings, self.annotations,
+                         self.files), f, pickle.HIGHEST_PROTOCOL)
+
+    def _matches(self, tokens):
+        """Give all occurrences of a sequence of tokens.
+
+        :param list tokens: Normalized tokens.
+        :yields: Tuples of the form: ``(key, tokens, start, end)`` where
+            ``tokens[start:end]`` is the match.
+        """
+        if not tokens:
+            return
+        postings = sorted((self.postings.get(t, set()) for t in set(tokens)),
+                          key=len)
+        n = len(tokens)
+        for key in postings[0].intersection(*postings[1:]):
+            for ann_tokens in self.annotations[key]:
+                for i in range(len(ann_tokens)-n+1):
+                    if ann_tokens[i:i+n] == tokens:
+                        yield (key, ann_tokens, i, i+n)
+
+
+class Frequencies:
+    """Token and n-gram frequencies of the annotation values of Eaf files
+    with breakdowns per speaker and per file. The speaker of a tier is the
+    participant of the tier, or the tier name when there is no participant.
+    N-grams never cross annotation boundaries. Frequencies are mergeable so
+    they can be counted in parallel with :func:`add_corpus`.
+
+    :var int n: Maximum length of the n-grams that are counted.
+    :var list tiers: Names of the tiers that are counted, when ``None`` all
+        tiers are counted.
+    :var bool lower: Flag to lowercase the tokens.
+    :var pattern: Regular expression matching a token.
+    :var collections.Counter counts: Frequencies of the form: ``{ngram ->
+        frequency}`` where every ngram is a tuple of tokens.
+    :var dict speakers: Frequencies per speaker of the form: ``{speaker ->
+        {ngram -> frequency}}``.
+    :var dict files: Frequencies per file of the form: ``{file_path ->
+        {ngram -> frequency}}``.
+    """
+    def __init__(self, file_path=None, n=1, tiers=None, lower=True,
+                 pattern=TOKEN):
+        """Construct either new empty frequencies or read them from a file.
+
+        :param str file_path: Path to read the frequencies from, if ``None``
+            empty frequencies will be created.
+        :param int n: Maximum length of the n-grams that are counted.
+        :param list tiers: Names of the tiers to count, if ``None`` all tiers
+            are counted.
+        :param bool lower: Flag to lowercase the tokens.
+        :param pattern: Regular expression matching a token.
+        :raises ValueError: If n is not strictly positive.
+        """
+        if n < 1:
+            raise ValueError('n should be strictly positive')
+        self.n = n
+        self.tiers = tiers
+        self.lower = lower
+        self.pattern = pattern
+        self.counts = collections.Counter()
+        self.speakers = {}
+        self.files = {}
+        if file_path is not None:
+            with open(file_path, 'rb') as f:
+                (self.n, self.tiers, self.lower, self.pattern, self.counts,
+                 self.speakers, self.files) = pickle.load(f)
+
+    def __call__(self, file_path):
+        """Count a single file in new frequencies with the same settings, this
+        is used as the worker function of :func:`add_corpus`.
+
+        :param str file_path: Path of the Eaf file.
+        :returns: :class:`pympi.Corpus.Frequencies` of the file.
+        """
+        freqs = Frequencies(n=self.n, tiers=self.tiers, lower=self.lower,
+                            pattern=self.pattern)
+        freqs.add_file(file_path)
+        return freqs
+
+    def add_corpus(self, file_paths, processes=None, progress=None):
+        """Count a corpus of Eaf files in parallel, see :func:`map_reduce`.
+
+        :param list file_paths: Paths of the Eaf files.
+        :param int processes: Number of worker processes, if ``None`` the
+            number of cpus is used.
+        :param func progress: Progress function, see :func:`map_reduce`.
+        :returns: List of errors of the form: ``[(file_path, exception)]``.
+        """
+        # The workers only get the settings, not the counts so far
+        worker = Frequencies(n=self.n, tiers=self.tiers, lower=self.lower,
+                             pattern=self.pattern)
+        freqs, errors, _ = map_reduce(
+            file_paths, worker, merge, processes=processes,
+            progress=progress, loader=None)
+        if freqs is not None:
+            self.update(freqs)
+        return errors
+
+    def add_eaf(self, eaf_obj, file_path=None):
+        """Count an Eaf object.
+
+        :param pympi.Elan.Eaf eaf_obj: The Eaf object.
+        :param str file_path: Path to count the frequencies of the file under,
+            if ``None`` no file breakdown is kept.
+        """
+        tiers = eaf_obj.get_tier_names() if self.tiers is None else\
+            [t for t in self.tiers if t in eaf_obj.tiers]
+        file_counts = collections.Counter()
+        for tier in tiers:
+            counts = collections.Counter()
+            for ann in eaf_obj.get_annotation_data_for_tier(tier):
+                tokens = tokenize(ann[2], self.lower, self.pattern)
+                for n in range(1, self.n+1):
+                    counts.update(tuple(tokens[i:i+n])
+                                  for i in range(len(tokens)-n+1))
+            speaker = eaf_obj.tiers[tier][2].get('PARTICIPANT') or tier
+            self.speakers.setdefault(speaker, collections.Counter()).update(
+                counts)
+            file_counts.update(counts)
+        self.counts.update(file_counts)
+        if file_path is not None:
+            self.files.setdefault(file_path, collections.Counter()).update(
+                file_counts)
+
+    def add_file(self, file_path):
+        """Count an Eaf file, only the counted tiers are loaded.
+
+        :param str file_path: Path of the Eaf file.
+        """
+        self.add_eaf(Eaf(file_path, tiers=self.tiers), file_path)
+
+    def get_frequencies(self, n=1, speaker=None, file_path=None):
+        """Give the frequencies of all n-grams of a given length.
+
+        :param int n: Length of the n-grams.
+        :param str speaker: Only count this speaker, if ``None`` all speakers
+            are counted.
+        :param str file_path: Only count this file, if ``None`` all files are
+            counted.
+        :returns: :class:`collections.Counter` of the form: ``{ngram ->
+            frequency}``, for unigrams the keys are the tokens themselves.
+        :raises KeyError: If the speaker or file is not counted.
+        :raises ValueError: If both a speaker and a file are given.
+        """
+        if speaker is not None and file_path is not None:
+            raise ValueError('Only speaker or file_path can be given')
+        counts = self.counts if speaker is None and file_path is None else\
+            self.speakers[speaker] if file_path is None else\
+            self.files[file_path]
+        return collections.Counter({k[0] if n == 1 else k: v
+                                    for k, v in counts.items()
+                                    if len(k) == n})
+
+    def to_file(self, file_path):
+        """Write the frequencies to a file.
+
+        :param str file_path: Filepath to write to.
+        """
+        with open(file_path, 'wb') as f:
+            pickle.dump((self.n, self.tiers, self.lower, self.pattern,
+                         self.counts, self.speakers, self.files), f,
+                        pickle.HIGHEST_PROTOCOL)
+
+    def update(self, other):
+        """Add the counts of other frequencies to these frequencies.
+
+        :param pympi.Corpus.Frequencies other: Frequencies to add.
+        """
+        self.counts.update(other.counts)
+        for key in other.speakers:
+            self.speakers.setdefault(key, collections.Counter()).update(
+                other.speakers[key])
+        for key in other.files:
+            self.files.setdefault(key, collections.Counter()).update(
+                other.files[key])
@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 
 from xml.etree import cElementTree as etree
+from pympi import Intervals
+import bisect
+import heapq
 import os
 import re
 import sys
@@ -8,6 +11,10 @@ import time
 
 VERSION = '1.69'
 
+CHAT_MAIN = re.compile(r'\*([^:]+):\s*(.*)')
+CHAT_DEPENDENT = re.compile(r'%([^:]+):\s*(.*)')
+CHAT_TIME = re.compile('\x15[^\x15]*?(\\d+)_(\\d+)\x15')
+
 
 class Eaf:
     """Read and write Elan's Eaf files.
@@ -58,6 +65,15 @@ class Eaf:
 
     :var dict annotations: Dictionary of annotations of the form:
         ``{id -> tier}``, this is only used internally.
+    :var int version: Last version given to a tier, this is only used
+        internally.
+    :var dict tier_versions: Version of every tier of the form: ``{tier ->
+        version}``, this is only used internally.
+    :var dict tier_statistics: Cached tier statistics of the form: ``{tier
+        -> (versions, statistics)}``, this is only used internally.
+    :var tuple time_span: Cached time interval of the aligned annotations of
+        the form: ``(version, (min_time, max_time))``, this is only used
+        internally.
     """
     ETYPES = {'iso12620', 'ecv', 'cve_id', 'lexen_id', 'resource_url'}
     CONSTRAINTS = {
@@ -71,12 +87,15 @@ class Eaf:
     MIMES = {'wav': 'audio/x-wav', 'mpg': 'video/mpeg', 'mpeg': 'video/mpg',
              'xml': 'text/xml'}
 
-    def __init__(self, file_path=None, author='pympi'):
+    def __init__(self, file_path=None, author='pympi', tiers=None):
         """Construct either a new Eaf file or read on from a file/stream.
 
         :param str file_path: Path to read from, - for stdin. If ``None`` an
             empty Eaf file will be created.
         :param str author: Author of the file.
+        :param list tiers: Names of the tiers to load when reading from a
+            file, if ``None`` all tiers are loaded. Parent tiers of reference
+            tiers have to be included as well.
         """
         ctz = -time.altzone if time.localtime(time.time()).tm_isdst and\
             time.daylight else -time.timezone
@@ -92,6 +111,10 @@ class Eaf:
             'xsi:noNamespaceSchemaLocation':
                 'http://www.mpi.nl/tools/elan/EAFv2.8.xsd'}
         self.annotations = {}
+        self.version = 0
+        self.tier_versions = {}
+        self.tier_statistics = {}
+        self.time_span = None
         self.constraints = {}
         self.controlled_vocabularies = {}
         self.external_refs = {}
@@ -113,7 +136,7 @@ class Eaf:
             self.properties.append(('lastUsedAnnotation', 0))
             self.add_tier('default')
         else:
-            parse_eaf(file_path, self)
+            parse_eaf(file_path, self, tiers)
 
     def add_annotation(self, id_tier, start, end, value='', svg_ref=None):
         """Add an annotation.
@@ -141,6 +164,38 @@ class Eaf:
         aid = self.generate_annotation_id()
         self.annotations[aid] = id_tier
         self.tiers[id_tier][0][aid] = (start_ts, end_ts, value, svg_ref)
+        self.invalidate_tier(id_tier)
+
+    def add_annotations(self, id_tier, annotations):
+        """Add multiple annotations at once, this is a lot faster then adding
+        them individually. All annotations are checked before anything is
+        added so on error the tier is left untouched.
+
+        :param str id_tier: Name of the tier.
+        :param list annotations: Annotations of the form:
+            ``[(start, end, value)]``.
+        :raises KeyError: If the tier is non existent.
+        :raises ValueError: If one of the values is negative or start is bigger
+                            then end or if the tiers already contains ref
+                            annotations.
+        """
+        if self.tiers[id_tier][1]:
+            raise ValueError('Tier already contains ref annotations...')
+        annotations = list(annotations)
+        for start, end, _ in annotations:
+            if start == end:
+                raise ValueError('Annotation length is zero...')
+            if start > end:
+                raise ValueError('Annotation length is negative...')
+            if start < 0:
+                raise ValueError('Start is negative...')
+        tier = self.tiers[id_tier][0]
+        for start, end, value in annotations:
+            aid = self.generate_annotation_id()
+            self.annotations[aid] = id_tier
+            tier[aid] = (self.generate_ts_id(start), self.generate_ts_id(end),
+                         value, None)
+        self.invalidate_tier(id_tier)
 
     def add_controlled_vocabulary(self, cv_id, ext_ref=None):
         """Add a controlled vocabulary. This will initialize the controlled
@@ -335,6 +390,7 @@ class Eaf:
         aid = self.generate_annotation_id()
         self.annotations[aid] = id_tier
         self.tiers[id_tier][1][aid] = (ann, value, prev, svg)
+        self.invalidate_tier(id_tier)
 
     def add_secondary_linked_file(self, file_path, relpath=None, mimetype=None,
                                   time_origin=None, assoc_with=None):
@@ -398,6 +454,7 @@ class Eaf:
                 'ANNOTATOR': ann}, len(self.tiers))
         else:
             self.tiers[tier_id] = ({}, {}, tier_dict, len(self.tiers))
+        self.invalidate_tier(tier_id)
 
     def child_tiers_for(self, id_tier):
         """.. deprecated: 1.5
@@ -419,6 +476,27 @@ class Eaf:
         for a in {a for b in ts for a in b} ^ set(self.timeslots):
             del(self.timeslots[a])
 
+    def complement_tier(self, tier, tier_name=None, value=''):
+        """Create a tier containing the time in the time interval of the
+        aligned annotations (see :func:`get_aligned_time_interval`) that is
+        not covered by the tier.
+
+        :param str tier: Name of the tier.
+        :param str tier_name: Name of the output tier, when ``None`` the name
+            will be generated.
+        :param str value: Value of the created annotations.
+        :returns: Name of the created tier.
+        :raises KeyError: If the tier is non existent.
+        """
+        if tier_name is None:
+            tier_name = '{}_complement'.format(tier)
+        start, end = self.get_aligned_time_interval()
+        intervals = Intervals.complement(self.get_tier_intervals(tier),
+                                         start, end)
+        self.add_tier(tier_name)
+        self.add_annotations(tier_name, ((b, e, value) for b, e in intervals))
+        return tier_name
+
     def copy_tier(self, eaf_obj, tier_name):
         """Copies a tier to another :class:`pympi.Elan.Eaf` object.
 
@@ -463,6 +541,26 @@ class Eaf:
         self.clean_time_slots()
         return ftos
 
+    def difference_tiers(self, tier1, tier2, tier_name=None, value=''):
+        """Create a tier containing the time covered by the first tier but not
+        by the second tier, for example: speaker A talking while B is silent.
+
+        :param str tier1: Name of the first tier.
+        :param str tier2: Name of the second tier.
+        :param str tier_name: Name of the output tier, when ``None`` the name
+            will be generated.
+        :param str value: Value of the created annotations.
+        :returns: Name of the created tier.
+        :raises KeyError: If a tier is non existent.
+        """
+        if tier_name is None:
+            tier_name = '{}_{}_difference'.format(tier1, tier2)
+        intervals = Intervals.difference(self.get_tier_intervals(tier1),
+                                         self.get_tier_intervals(tier2))
+        self.add_tier(tier_name)
+        self.add_annotations(tier_name, ((b, e, value) for b, e in intervals))
+        return tier_name
+
     def extract(self, start, end):
         """Extracts the selected time frame as a new object.
 
@@ -542,6 +640,22 @@ class Eaf:
         self.timeslots[ts] = time
         return ts
 
+    def get_aligned_time_interval(self):
+        """Give the time interval of the aligned annotations of the file,
+        unlike :func:`get_full_time_interval` timeslots without a time are
+        ignored. The interval is cached until any tier is changed.
+
+        :returns: Tuple of the form: ``(min_time, max_time)``.
+        """
+        if self.time_span is None or self.time_span[0] != self.version:
+            times = [(self.timeslots[a[0]], self.timeslots[a[1]])
+                     for tier in self.tiers.values() for a in tier[0].values()]
+            times = [t for t in times if t[0] is not None and t[1] is not None]
+            self.time_span = (self.version, (min(b for b, e in times),
+                                             max(e for b, e in times))
+                              if times else (0, 0))
+        return self.time_span[1]
+
     def get_annotation_data_at_time(self, id_tier, time):
         """Give the annotations at the given time. When the tier contains
         reference annotations this will be returned, check
@@ -629,6 +743,38 @@ class Eaf:
         return [(self.timeslots[a[b][0]], self.timeslots[a[b][1]], a[b][2])
                 for b in a]
 
+    def get_cached_tier_statistics(self, id_tier):
+        """Give the cached statistics of a tier without the coverage, this
+        function is mainly used internally, see :func:`get_tier_statistics`.
+
+        :param str id_tier: Name of the tier.
+        :raises KeyError: If the tier is non existent.
+        """
+        versions = []
+        tier = id_tier
+        while tier is not None and tier not in versions:
+            versions.append(tier)
+            tier = self.tiers[tier][2].get('PARENT_REF')\
+                if tier in self.tiers else None
+        versions = tuple(self.tier_versions.get(t, 0) for t in versions)
+        cached = self.tier_statistics.get(id_tier)
+        if cached is not None and cached[0] == versions:
+            return cached[1]
+        anns = [a for a in self.get_annotation_data_for_tier(id_tier)
+                if a[0] is not None and a[1] is not None]
+        duration = sum(a[1]-a[0] for a in anns)
+        stats = {
+            'annotations': len(anns),
+            'duration': duration,
+            'mean_duration': duration/float(len(anns)) if anns else 0.0,
+            'min_time': min(a[0] for a in anns) if anns else None,
+            'max_time': max(a[1] for a in anns) if anns else None,
+            'covered': sum(e-b for b, e in Intervals.merge(
+                sorted((a[0], a[1]) for a in anns))),
+            'values': len(set(a[2] for a in anns))}
+        self.tier_statistics[id_tier] = (versions, stats)
+        return stats
+
     def get_child_tiers_for(self, id_tier):
         """Give all child tiers for a tier.
 
@@ -974,6 +1120,18 @@ class Eaf:
                 self.tiers[t][2]['LINGUISTIC_TYPE_REF'] == ling_type and
                 (parent is None or self.tiers[t][2]['PARENT_REF'] == parent)]
 
+    def get_tier_intervals(self, id_tier):
+        """Give the sorted time intervals of the annotations in a tier,
+        annotations with unaligned timeslots are skipped.
+
+        :param str id_tier: Name of the tier.
+        :returns: List of the form: ``[(begin, end)]``.
+        :raises KeyError: If the tier is non existent.
+        """
+        return sorted((a[0], a[1]) for a in
+                      self.get_annotation_data_for_tier(id_tier)
+                      if a[0] is not None and a[1] is not None)
+
     def get_tier_names(self):
         """List all the tier names.
 
@@ -981,6 +1139,27 @@ class Eaf:
         """
         return self.tiers.keys()
 
+    def get_tier_statistics(self, id_tier):
+        """Give statistics of a tier, the statistics are cached and only
+        recomputed when the tier (or for reference tiers its parent) was
+        changed by one of the methods since the last call. The coverage is
+        relative to the time span of all the aligned annotations in the file,
+        see :func:`get_aligned_time_interval`.
+
+        :param str id_tier: Name of the tier.
+        :returns: Dictionary of the form: ``{'annotations': count,
+            'duration': total_duration, 'mean_duration': mean_duration,
+            'min_time': min_time, 'max_time': max_time, 'covered':
+            covered_time, 'coverage': coverage_ratio, 'values':
+            distinct_values}``, where the times are ``None`` for empty tiers.
+        :raises KeyError: If the tier is non existent.
+        """
+        stats = dict(self.get_cached_tier_statistics(id_tier))
+        start, end = self.get_aligned_time_interval()
+        span = end - start
+        stats['coverage'] = stats['covered']/float(span) if span else 0.0
+        return stats
+
     def insert_annotation(self, id_tier, start, end, value='', svg_ref=None):
         """.. deprecated:: 1.2
 
@@ -996,6 +1175,59 @@ class Eaf:
         """
         return self.add_ref_annotation(id_tier, tier2, time, value, prev, svg)
 
+    def intersect_tiers(self, tier1, tier2, tier_name=None, value=''):
+        """Create a tier containing the time covered by both tiers, for
+        example: gestures overlapping speech.
+
+        :param str tier1: Name of the first tier.
+        :param str tier2: Name of the second tier.
+        :param str tier_name: Name of the output tier, when ``None`` the name
+            will be generated.
+        :param str value: Value of the created annotations.
+        :returns: Name of the created tier.
+        :raises KeyError: If a tier is non existent.
+        """
+        if tier_name is None:
+            tier_name = '{}_{}_intersection'.format(tier1, tier2)
+        intervals = Intervals.intersection(self.get_tier_intervals(tier1),
+                                           self.get_tier_intervals(tier2))
+        self.add_tier(tier_name)
+        self.add_annotations(tier_name, ((b, e, value) for b, e in intervals))
+        return tier_name
+
+    def join_tiers(self, tier1, tier2, how='inner', min_overlap=0):
+        """Give all pairs of annotations of two tiers that overlap in time
+        together with the overlap duration, for example to align words with
+        gestures. For the types of joins see :func:`pympi.Intervals.join`.
+
+        :param str tier1: Name of the first tier.
+        :param str tier2: Name of the second tier.
+        :param str how: Type of join, one of ``inner``, ``left`` or ``anti``.
+        :param int min_overlap: Minimal overlap in ms for a pair to match.
+        :returns: Generator of tuples of the form: ``(ann1, ann2, overlap)``
+            where the annotations are of the form ``(begin, end, value)`` and
+            ``ann2`` is ``None`` for unmatched annotations of the first tier.
+        :raises KeyError: If a tier is non existent.
+        :raises ValueError: If the type of join is unknown.
+        """
+        if how not in ('inner', 'left', 'anti'):
+            raise ValueError('how has to be one of inner, left or anti')
+        a = [x for x in self.get_annotation_data_for_tier(tier1)
+             if x[0] is not None and x[1] is not None]
+        b = [x for x in self.get_annotation_data_for_tier(tier2)
+             if x[0] is not None and x[1] is not None]
+        return Intervals.join(a, b, how, min_overlap)
+
+    def invalidate_tier(self, id_tier):
+        """Mark a tier as changed so that the cached statistics are
+        recomputed, this function is mainly used internally. Call it when you
+        change the tier or timeslot data directly.
+
+        :param str id_tier: Name of the tier.
+        """
+        self.version += 1
+        self.tier_versions[id_tier] = self.version
+
     def merge_tiers(self, tiers, tiernew=None, gapt=0, sep='_', safe=False):
         """Merge tiers into a new tier and when the gap is lower then the
         threshhold glue the annotations together.
@@ -1045,6 +1277,7 @@ class Eaf:
 
         self.tiers[id_tier][0].clear()
         self.tiers[id_tier][1].clear()
+        self.invalidate_tier(id_tier)
         if clean:
             self.clean_time_slots()
 
@@ -1069,6 +1302,7 @@ class Eaf:
             del(self.tiers[id_tier][0][b[0]])
             del(self.annotations[b[0]])
             removed += 1
+        self.invalidate_tier(id_tier)
         if clean:
             self.clean_time_slots()
         return removed
@@ -1207,6 +1441,7 @@ class Eaf:
                 bucket.append(aid)
         for aid in bucket:
             del(self.tiers[id_tier][1][aid])
+        self.invalidate_tier(id_tier)
         return removed
 
     def remove_secondary_linked_files(self, file_path=None, relpath=None,
@@ -1245,6 +1480,9 @@ class Eaf:
         :raises KeyError: If tier is non existent.
         """
         del(self.tiers[id_tier])
+        self.invalidate_tier(id_tier)
+        self.tier_statistics.pop(id_tier, None)
+        self.tier_versions.pop(id_tier, None)
         if clean:
             self.clean_time_slots()
 
@@ -1270,12 +1508,17 @@ class Eaf:
         childs = self.get_child_tiers_for(id_from)
         self.tiers[id_to] = self.tiers.pop(id_from)
         self.tiers[id_to][2]['TIER_ID'] = id_to
+        self.invalidate_tier(id_from)
+        self.invalidate_tier(id_to)
+        self.tier_statistics.pop(id_from, None)
+        self.tier_versions.pop(id_from, None)
         for child in childs:
             self.tiers[child][2]['PARENT_REF'] = id_to
 
     def shift_annotations(self, time):
         """Shift all annotations in time. Annotations that are in the beginning
-        and a left shift is applied can be squashed or discarded.
+        and a left shift is applied can be squashed or discarded. Timeslots
+        that are shared by annotations are shifted only once.
 
         :param int time: Time shift width, negative numbers make a left shift.
         :returns: Tuple of a list of squashed annotations and a list of removed
@@ -1283,26 +1526,82 @@ class Eaf:
         """
         total_re = []
         total_sq = []
+        shifted = {}
         for name, tier in self.tiers.items():
             squashed = []
             for aid, (begin, end, value, _) in tier[0].items():
                 if self.timeslots[end]+time <= 0:
                     squashed.append((name, aid))
+                    continue
                 elif self.timeslots[begin]+time < 0:
                     total_sq.append((name, self.timeslots[begin],
                                      self.timeslots[end], value))
-                    self.timeslots[begin] = 0
-                else:
-                    self.timeslots[begin] += time
-                    self.timeslots[end] += time
+                for ts in (begin, end):
+                    shifted[ts] = max(0, self.timeslots[ts]+time)
             for name, aid in squashed:
                 start, end, value, _ = self.tiers[name][0][aid]
                 del(self.tiers[name][0][aid])
                 del(self.annotations[aid])
                 total_re.append(
                     (name, self.timeslots[start], self.timeslots[end], value))
+        self.timeslots.update(shifted)
+        for name in self.tiers:
+            self.invalidate_tier(name)
         return total_sq, total_re
 
+    def snap_boundaries(self, id_tier, ref_tier, tolerance):
+        """Move every boundary of a tier to the nearest boundary of a
+        reference tier if it is within the tolerance. The nearest boundary is
+        found with a binary search over the sorted reference boundaries and
+        the timeslots are changed in place, so annotations on other tiers
+        sharing a timeslot move along. A timeslot is left alone when snapping
+        would give any annotation using it, on any tier, a length of zero or
+        less.
+
+        :param str id_tier: Name of the tier to snap.
+        :param str ref_tier: Name of the reference tier.
+        :param int tolerance: Maximal distance in ms to move a boundary.
+        :returns: Number of moved timeslots.
+        :raises KeyError: If a tier is non existent.
+        """
+        bounds = sorted({self.timeslots[ts] for a in
+                         self.tiers[ref_tier][0].values() for ts in a[:2]
+                         if self.timeslots[ts] is not None})
+        slots = {ts for a in self.tiers[id_tier][0].values() for ts in a[:2]}
+        uses = {}
+        for name, tier in self.tiers.items():
+            for ts1, ts2, _, _ in tier[0].values():
+                for ts in {ts1, ts2} & slots:
+                    uses.setdefault(ts, []).append((name, ts1, ts2))
+
+        def valid(ts):
+            for _, ts1, ts2 in uses[ts]:
+                begin = snapped.get(ts1, self.timeslots[ts1])
+                end = snapped.get(ts2, self.timeslots[ts2])
+                if begin is not None and end is not None and begin >= end:
+                    return False
+            return True
+        # Every move is checked against the moves decided before it, so the
+        # last move touching an annotation sees its final boundaries.
+        snapped, seen = {}, set()
+        for ts1, ts2, _, _ in self.tiers[id_tier][0].values():
+            for ts in (ts1, ts2):
+                moment = self.timeslots[ts]
+                if moment is None or ts in seen or not bounds:
+                    continue
+                seen.add(ts)
+                i = bisect.bisect_left(bounds, moment)
+                nearest = min(bounds[max(i-1, 0):i+1],
+                              key=lambda x: abs(x-moment))
+                if nearest != moment and abs(nearest-moment) <= tolerance:
+                    snapped[ts] = nearest
+                    if not valid(ts):
+                        del(snapped[ts])
+        self.timeslots.update(snapped)
+        for name in {u[0] for ts in snapped for u in uses[ts]}:
+            self.invalidate_tier(name)
+        return len(snapped)
+
     def to_file(self, file_path, pretty=True):
         """Write the object to a file, if the file already exists a backup will
         be created with the ``.bak`` suffix.
@@ -1314,32 +1613,250 @@ class Eaf:
         """
         to_eaf(file_path, self, pretty)
 
-    def to_textgrid(self, filtin=[], filtex=[], regex=False):
-        """Convert the object to a :class:`pympi.Praat.TextGrid` object.
+    def to_frames(self, tiers=None, hop=10, binary=False, start=0, end=None):
+        """Convert tiers to a frame synchronous label matrix, for example for
+        training acoustic models. See :func:`pympi.Intervals.frames` for the
+        details of the output.
+
+        .. note:: This function requires :mod:`numpy`.
+
+        :param list tiers: Names of the tiers in column order, if ``None`` all
+            tiers are used in their order in the file.
+        :param int hop: Hop size in ms.
+        :param bool binary: Flag to only mark the presence of annotations.
+        :param int start: Start time of the first frame.
+        :param int end: End time, if ``None`` the end of the aligned
+            annotations is used, see :func:`get_aligned_time_interval`.
+        :returns: Tuple of the form: ``(matrix, vocabulary)``.
+        :raises KeyError: If a tier is non existent.
+        :raises ImportError: If numpy can't be loaded.
+        :raises ValueError: If the hop size is not strictly positive.
+        """
+        if tiers is None:
+            tiers = sorted(self.tiers, key=lambda x: self.tiers[x][3])
+        if end is None:
+            end = self.get_aligned_time_interval()[1]
+        return Intervals.frames(
+            [[a for a in self.get_annotation_data_for_tier(t)
+              if a[0] is not None and a[1] is not None] for t in tiers],
+            start, end, hop, binary)
+
+    def to_textgrid(self, filtin=[], filtex=[], regex=False, overlaps='split'):
+        """Convert the object to a :class:`pympi.Praat.TextGrid` object. Every
+        tier is sorted once and the intervals are set directly, overlaps are
+        found in the same pass. Annotations without a time are skipped.
+
+        +-------+-----------------------------------------------------------+
+        | value | Overlapping annotations                                   |
+        +=======+===========================================================+
+        | split | Are moved to extra tiers named ``tier_1``, ``tier_2``     |
+        |       | etc. placed after the tier, using as few tiers as needed. |
+        +-------+-----------------------------------------------------------+
+        | raise | Raise a :class:`ValueError`.                              |
+        +-------+-----------------------------------------------------------+
+        | skip  | Are left out, the earliest annotation is kept.            |
+        +-------+-----------------------------------------------------------+
 
         :param list filtin: Include only tiers in this list, if empty
             all tiers are included.
         :param list filtex: Exclude all tiers in this list.
         :param bool regex: If this flag is set the filters are seen as regexes.
+        :param str overlaps: What to do with overlapping annotations, one of
+            ``split``, ``raise`` or ``skip``.
         :returns: :class:`pympi.Praat.TextGrid` representation.
         :raises ImportError: If the pympi.Praat module can't be loaded.
+        :raises ValueError: If overlaps is unknown or if annotations overlap
+            and overlaps is ``raise``.
         """
         from pympi.Praat import TextGrid
-        _, end = self.get_full_time_interval()
+        if overlaps not in ('split', 'raise', 'skip'):
+            raise ValueError('overlaps has to be one of split, raise or skip')
+        _, end = self.get_aligned_time_interval()
         tgout = TextGrid(xmax=end/1000.0)
         func = (lambda x, y: re.match(x, y)) if regex else lambda x, y: x == y
         for tier in self.tiers:
             if (filtin and not any(func(f, tier) for f in filtin)) or\
                     (filtex and any(func(f, tier) for f in filtex)):
                 continue
+            intervals = sorted(
+                (a[0]/1000.0, a[1]/1000.0, a[2])
+                for a in self.get_annotation_data_for_tier(tier)
+                if a[0] is not None and a[1] is not None)
             ctier = tgout.add_tier(tier)
-            for intv in self.get_annotation_data_for_tier(tier):
-                try:
-                    ctier.add_interval(intv[0]/1000.0, intv[1]/1000.0, intv[2])
-                except:
-                    pass
+            if all(intervals[i-1][1] <= intervals[i][0]
+                   for i in range(1, len(intervals))):
+                ctier.intervals = intervals
+                continue
+            if overlaps == 'raise':
+                raise ValueError('Annotations overlap in tier {}'.format(tier))
+            splits = [[]]
+            # Heaps of the extra tiers that are in use and that are free
+            busy, free = [], []
+            for interval in intervals:
+                while busy and busy[0][0] <= interval[0]:
+                    heapq.heappush(free, heapq.heappop(busy)[1])
+                if free:
+                    i = heapq.heappop(free)
+                elif not busy or overlaps == 'split':
+                    i = len(busy)
+                    if i == len(splits):
+                        splits.append([])
+                else:
+                    continue
+                splits[i].append(interval)
+                heapq.heappush(busy, (interval[1], i))
+            ctier.intervals = splits[0]
+            for i, split in enumerate(splits[1:], 1):
+                tgout.add_tier('{}_{:d}'.format(tier, i)).intervals = split
         return tgout
 
+    def union_tiers(self, tier1, tier2, tier_name=None, value=''):
+        """Create a tier containing the time covered by either of the tiers.
+
+        :param str tier1: Name of the first tier.
+        :param str tier2: Name of the second tier.
+        :param str tier_name: Name of the output tier, when ``None`` the name
+            will be generated.
+        :param str value: Value of the created annotations.
+        :returns: Name of the created tier.
+        :raises KeyError: If a tier is non existent.
+        """
+        if tier_name is None:
+            tier_name = '{}_{}_union'.format(tier1, tier2)
+        intervals = Intervals.union(self.get_tier_intervals(tier1),
+                                    self.get_tier_intervals(tier2))
+        self.add_tier(tier_name)
+        self.add_annotations(tier_name, ((b, e, value) for b, e in intervals))
+        return tier_name
+
+    def validate(self):
+        """Check the tiers for problems that make the file invalid for ELAN.
+        Every check is a sort followed by a sweep or binary searches so this
+        runs in ``O(n log n)`` per tier. The checks are:
+
+        * Parent tiers, linguistic types and timeslots exist.
+        * Aligned annotations have a positive length and don't overlap within
+          their tier.
+        * Reference annotations refer to an existing annotation in the parent
+          tier and their ``PREVIOUS_ANNOTATION`` chains are unbroken.
+        * Child tiers satisfy the constraint of their linguistic type, for
+          example a ``Time_Subdivision`` tier has to tile its parent
+          annotations without gaps and a ``Symbolic_Association`` tier has at
+          most one annotation per parent annotation.
+
+        Unaligned timeslots, timeslots without a value, are skipped in the
+        time based checks.
+
+        :returns: Sorted list of problems of the form: ``[(tier, id,
+            message)]`` where the id is ``None`` for problems of the tier
+            itself. An empty list means that no problems were found.
+        """
+        problems = []
+        for tier, (aligned, refs, attrib, _) in self.tiers.items():
+            def problem(aid, message):
+                problems.append((tier, aid, message))
+            ling = self.linguistic_types.get(attrib['LINGUISTIC_TYPE_REF'])
+            if ling is None:
+                problem(None, 'Linguistic type does not exist')
+            constraint = ling.get('CONSTRAINTS') if ling else None
+            parent = attrib.get('PARENT_REF')
+            if parent is not None and parent not in self.tiers:
+                problem(None, 'Parent tier {} does not exist'.format(parent))
+                parent = None
+            if constraint is not None and parent is None:
+                problem(None, 'Constraint {} without a parent'.format(
+                    constraint))
+            elif constraint in ('Symbolic_Subdivision',
+                                'Symbolic_Association') and aligned:
+                problem(None, 'Aligned annotations in a symbolic tier')
+            elif constraint in ('Time_Subdivision', 'Included_In') and refs:
+                problem(None, 'Reference annotations in an aligned tier')
+
+            # Aligned annotations, overlaps are found with a sweep in begin
+            # time order keeping the annotation that ends last.
+            times, unaligned = [], False
+            for aid, (ts1, ts2, _, _) in aligned.items():
+                if ts1 not in self.timeslots or ts2 not in self.timeslots:
+                    problem(aid, 'Timeslot does not exist')
+                elif self.timeslots[ts1] is None or\
+                        self.timeslots[ts2] is None:
+                    unaligned = True
+                elif self.timeslots[ts1] >= self.timeslots[ts2]:
+                    problem(aid, 'Length is not positive')
+                else:
+                    times.append((self.timeslots[ts1], self.timeslots[ts2],
+                                  aid))
+            times.sort()
+            last = None
+            for begin, end, aid in times:
+                if last is not None and begin < last[0]:
+                    problem(aid, 'Overlaps with {}'.format(last[1]))
+                if last is None or end > last[0]:
+                    last = (end, aid)
+
+            # Containment in the parent, the only parent annotation that can
+            # contain a child is the last one starting before it.
+            if parent is not None and constraint in ('Time_Subdivision',
+                                                     'Included_In'):
+                parents = sorted(
+                    (self.timeslots[ts1], self.timeslots[ts2], aid)
+                    for aid, (ts1, ts2, _, _) in
+                    self.tiers[parent][0].items()
+                    if self.timeslots.get(ts1) is not None and
+                    self.timeslots.get(ts2) is not None)
+                begins = [p[0] for p in parents]
+                children = {}
+                for begin, end, aid in times:
+                    i = bisect.bisect_right(begins, begin) - 1
+                    if i < 0 or end > parents[i][1]:
+                        problem(aid, 'Not within a parent annotation')
+                    else:
+                        children.setdefault(i, []).append((begin, end))
+                if constraint == 'Time_Subdivision' and not unaligned:
+                    for i, (begin, end, aid) in enumerate(parents):
+                        bounds = [begin]
+                        for child in children.get(i, []):
+                            bounds.extend(child)
+                        bounds.append(end)
+                        if len(bounds) > 2 and any(
+                                bounds[j] != bounds[j+1]
+                                for j in range(0, len(bounds), 2)):
+                            problem(None, 'Subdivision of {} has gaps'.format(
+                                aid))
+
+            # Reference annotations grouped by the annotation they refer to.
+            groups = {}
+            for aid, (ref, _, previous, _) in refs.items():
+                if ref not in self.annotations:
+                    problem(aid, 'Referenced annotation does not exist')
+                    continue
+                if parent is not None and self.annotations[ref] != parent:
+                    problem(aid, 'Referenced annotation is not in the parent '
+                            'tier')
+                if previous is not None and previous not in refs:
+                    problem(aid, 'Previous annotation is not in the tier')
+                elif previous is not None and refs[previous][0] != ref:
+                    problem(aid, 'Previous annotation refers to another '
+                            'annotation')
+                groups.setdefault(ref, []).append(aid)
+            for ref, aids in groups.items():
+                if constraint == 'Symbolic_Association' and len(aids) > 1:
+                    problem(None, 'Multiple annotations associated with '
+                            '{}'.format(ref))
+                    continue
+                following = {}
+                for aid in aids:
+                    following.setdefault(refs[aid][2], []).append(aid)
+                chain = set()
+                current = following.get(None, [])
+                while len(current) == 1 and current[0] not in chain:
+                    chain.add(current[0])
+                    current = following.get(current[0], [])
+                if len(chain) != len(aids):
+                    problem(None, 'Previous annotation chain of {} is '
+                            'broken'.format(ref))
+        return sorted(problems, key=lambda x: (x[0], x[1] or '', x[2]))
+
 
 def eaf_from_chat(file_path, codec='ascii', extension='wav'):
     """Reads a .cha file and converts it to an elan object. The functions tries
@@ -1350,14 +1867,21 @@ def eaf_from_chat(file_path, codec='ascii', extension='wav'):
     Eaf file will be added there too. The file description of chat files can be
     found `here <http://childes.psy.cmu.edu/manuals/CHAT.pdf>`_.
 
+    The file is read as a stream of lines, lines starting with a tab continue
+    the previous line. The annotations are put in the tiers directly and the
+    dependent tier annotations refer to their main tier annotation without a
+    search. Utterances without a time and their dependent tiers are skipped.
+
     :param str file_path: The file path of the .cha file.
     :param str codec: The codec, if the @UTF8 header is present it will choose
         utf-8, default is ascii. Older CHAT files don't have their encoding
         embedded in a header so you will probably need to choose some obscure
         ISO charset then.
     :param str extension: The extension of the media file.
-    :throws StopIteration: If the file doesn't contain a @End header, thus
-        inferring the file is broken.
+    :returns: The :class:`pympi.Elan.Eaf` object.
+    :raises ValueError: If the file doesn't contain a @End header, thus
+        inferring the file is broken, or if an utterance has a length of zero
+        or less.
     """
     eafob = Eaf()
     eafob.add_linguistic_type('parent')
@@ -1365,65 +1889,152 @@ def eaf_from_chat(file_path, codec='ascii', extension='wav'):
         'child', constraints='Symbolic_Association', timealignable=False)
     participantsdb = {}
     last_annotation = None
-    with open(file_path, 'r') as chatin:
-        while True:
-            line = chatin.readline().strip().decode(codec)
-            if line == '@UTF8':  # Codec marker
-                codec = 'utf8'
+    for line in _chat_lines(file_path, codec):
+        if line == '@End':  # End of file marker
+            break
+        elif line.startswith('@'):  # Header marker
+            if ':' not in line:
                 continue
-            elif line == '@End':  # End of file marker
-                break
-            elif line.startswith('@') and line != '@Begin':  # Header marker
-                key, value = line.split(':\t')
-                eafob.add_property('{}:\t'.format(key), value)
-                if key == '@Languages':
-                    for language in value.split(','):
-                        eafob.add_language(language)
-                elif key == '@Participants':
-                    for participant in value.split(','):
-                        splits = participant.strip().split(' ')
-                        splits = map(lambda x: x.replace('_', ' '), splits)
-                        if len(splits) == 2:
-                            participantsdb[splits[0]] = (None, splits[1])
-                        elif len(splits) == 3:
-                            participantsdb[splits[0]] = (splits[1], splits[2])
-                elif key == '@ID':
-                    ids = map(lambda x: x.replace('_', ''), value.split('|'))
-                    eafob.add_tier(ids[2], part=participantsdb[ids[2]][0],
-                                   language=ids[0])
-                elif key == '@Media':
-                    media = value.split(',')
-                    eafob.add_linked_file(
-                        'file://{}.{}'.format(media[0], extension))
-                elif key == '@Transcriber:':
-                    for tier in eafob.get_tier_names():
-                        eafob.tiers[tier][2]['ANNOTATOR'] = value
-            elif line.startswith('*'):  # Main tier marker
-                while len(line.split('\x15')) != 3:
-                    line += chatin.readline().decode(codec).strip()
-                for participant in participantsdb.keys():
-                    if line.startswith('*{}:'.format(participant)):
-                        splits = ''.join(line.split(':')[1:]).strip()
-                        utt, time, _ = splits.split('\x15')
-                        time = map(int, time.split('_'))
-                        last_annotation = (participant, time[0], time[1], utt)
-                        eafob.add_annotation(*last_annotation)
-            elif line.startswith('%'):  # Dependant tier marker
-                splits = line.split(':')
-                name = '{}_{}'.format(last_annotation[0], splits[0][1:])
-                if name not in eafob.get_tier_names():
-                    eafob.add_tier(name, 'child', last_annotation[0])
-                eafob.add_ref_annotation(
-                    name, last_annotation[0], sum(last_annotation[1:3])/2,
-                    ''.join(splits[1:]).strip())
+            key, value = line.split(':', 1)
+            value = value.strip()
+            eafob.add_property('{}:\t'.format(key), value)
+            if key == '@Languages':
+                for language in value.split(','):
+                    eafob.add_language(language.strip())
+            elif key == '@Participants':
+                for participant in value.split(','):
+                    splits = [x.replace('_', ' ') for x in participant.split()]
+                    if len(splits) == 2:
+                        participantsdb[splits[0]] = (None, splits[1])
+                    elif len(splits) == 3:
+                        participantsdb[splits[0]] = (splits[1], splits[2])
+            elif key == '@ID':
+                ids = [x.replace('_', '') for x in value.split('|')]
+                eafob.add_tier(ids[2], part=participantsdb[ids[2]][0],
+                               language=ids[0])
+            elif key == '@Media':
+                media = value.split(',')
+                eafob.add_linked_file(
+                    'file://{}.{}'.format(media[0].strip(), extension))
+            elif key == '@Transcriber':
+                for tier in eafob.get_tier_names():
+                    eafob.tiers[tier][2]['ANNOTATOR'] = value
+        elif line.startswith('*'):  # Main tier marker
+            last_annotation = None
+            match = CHAT_MAIN.match(line)
+            bullet = match and CHAT_TIME.search(match.group(2))
+            if not bullet or match.group(1) not in participantsdb:
+                continue
+            participant = match.group(1)
+            if participant not in eafob.tiers:
+                eafob.add_tier(participant,
+                               part=participantsdb[participant][0])
+            start, end = int(bullet.group(1)), int(bullet.group(2))
+            if start >= end:
+                raise ValueError('Annotation length is zero or negative')
+            last_annotation = eafob.generate_annotation_id()
+            eafob.annotations[last_annotation] = participant
+            eafob.tiers[participant][0][last_annotation] = (
+                eafob.generate_ts_id(start), eafob.generate_ts_id(end),
+                match.group(2)[:bullet.start()].strip(), None)
+        elif line.startswith('%') and last_annotation:  # Dependant tier
+            match = CHAT_DEPENDENT.match(line)
+            if not match:
+                continue
+            participant = eafob.annotations[last_annotation]
+            name = '{}_{}'.format(participant, match.group(1))
+            if name not in eafob.tiers:
+                eafob.add_tier(name, 'child', participant)
+            aid = eafob.generate_annotation_id()
+            eafob.annotations[aid] = name
+            eafob.tiers[name][1][aid] = (
+                last_annotation, match.group(2).strip(), None, None)
+    else:
+        raise ValueError('No @End header, the file is probably broken')
+    for tier in eafob.tiers:
+        eafob.invalidate_tier(tier)
     return eafob
 
 
-def parse_eaf(file_path, eaf_obj):
+def _chat_lines(file_path, codec):
+    """Read the logical lines of a .cha file, lines starting with a tab are
+    joined with the previous line. The codec is switched to utf-8 on a
+    @UTF8 header or a byte order mark.
+
+    :param str file_path: The file path of the .cha file.
+    :param str codec: The initial codec.
+    :yields: The stripped lines.
+    """
+    line = None
+    with open(file_path, 'rb') as chatin:
+        for raw in chatin:
+            if raw.startswith(b'\xef\xbb\xbf'):
+                raw, codec = raw[3:], 'utf-8'
+            elif raw.strip() == b'@UTF8':  # Codec marker
+                codec = 'utf-8'
+            if raw.startswith(b'\t') and line is not None:
+                line += ' ' + raw.decode(codec).strip()
+                continue
+            if line is not None:
+                yield line
+            line = raw.decode(codec).strip()
+    if line is not None:
+        yield line
+
+
+class ChatConverter:
+    """Picklable function converting a .cha file to an Eaf file, used by
+    :func:`batch_eaf_from_chat`.
+
+    :var str out_dir: Directory for the Eaf files, if ``None`` they are put
+        next to the .cha files.
+    :var str codec: Codec of the .cha files.
+    :var str extension: Extension of the media files.
+    """
+    def __init__(self, out_dir=None, codec='ascii', extension='wav'):
+        self.out_dir = out_dir
+        self.codec = codec
+        self.extension = extension
+
+    def __call__(self, file_path):
+        out_path = '{}.eaf'.format(os.path.splitext(file_path)[0])
+        if self.out_dir is not None:
+            out_path = os.path.join(self.out_dir, os.path.basename(out_path))
+        eaf_from_chat(file_path, self.codec, self.extension).to_file(out_path)
+        return [out_path]
+
+
+def batch_eaf_from_chat(file_paths, out_dir=None, codec='ascii',
+                        extension='wav', processes=None, progress=None):
+    """Convert a corpus of .cha files to Eaf files in parallel, see
+    :func:`eaf_from_chat` and :func:`pympi.Corpus.map_reduce`.
+
+    :param list file_paths: Paths of the .cha files.
+    :param str out_dir: Directory for the Eaf files, if ``None`` they are put
+        next to the .cha files with the extension changed.
+    :param str codec: Codec of the .cha files without a @UTF8 header.
+    :param str extension: Extension of the media files.
+    :param int processes: Number of worker processes, if ``None`` the number
+        of cpus is used.
+    :param func progress: Progress function, see
+        :func:`pympi.Corpus.map_reduce`.
+    :returns: Tuple of the form: ``(eaf_paths, errors)`` where the errors are
+        of the form: ``[(file_path, exception)]``.
+    """
+    from pympi.Corpus import map_reduce, merge
+    eaf_paths, errors, _ = map_reduce(
+        file_paths, ChatConverter(out_dir, codec, extension), merge,
+        [], processes, progress=progress, loader=None)
+    return eaf_paths, errors
+
+
+def parse_eaf(file_path, eaf_obj, tiers=None):
     """Parse an EAF file
 
     :param str file_path: Path to read from, - for stdin.
     :param pympi.Elan.Eaf eaf_obj: Existing EAF object to put the data in.
+    :param list tiers: Names of the tiers to load, if ``None`` all tiers are
+        loaded. The annotations of the other tiers are skipped.
     :returns: EAF object.
     """
     if file_path == '-':
@@ -1468,6 +2079,8 @@ def parse_eaf(file_path, eaf_obj):
         # Tier
         elif elem.tag == 'TIER':
             tier_id = elem.attrib['TIER_ID']
+            if tiers is not None and tier_id not in tiers:
+                continue
             align = {}
             ref = {}
             for elem1 in elem:
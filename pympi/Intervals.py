@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+
+import heapq
+
+VERSION = '1.69'
+
+
+def merge(intervals):
+    """Merge overlapping and touching intervals. All functions in this module
+    work on lists of ``(begin, end)`` tuples and are agnostic of the time unit
+    so they can be used for both :class:`pympi.Elan.Eaf` and
+    :class:`pympi.Praat.Tier` times.
+
+    :param list intervals: Intervals sorted on begin time.
+    :returns: Sorted list of disjoint intervals.
+    """
+    out = []
+    for begin, end in intervals:
+        if out and begin <= out[-1][1]:
+            if end > out[-1][1]:
+                out[-1] = (out[-1][0], end)
+        else:
+            out.append((begin, end))
+    return out
+
+
+def union(a, b):
+    """Give the time union of two lists of intervals in ``O(n+m)``.
+
+    :param list a: Intervals sorted on begin time.
+    :param list b: Intervals sorted on begin time.
+    :returns: Sorted list of disjoint intervals.
+    """
+    return merge(heapq.merge(a, b))
+
+
+def intersection(a, b):
+    """Give the time intersection of two lists of intervals in ``O(n+m)``.
+
+    :param list a: Intervals sorted on begin time.
+    :param list b: Intervals sorted on begin time.
+    :returns: Sorted list of disjoint intervals.
+    """
+    a, b = merge(a), merge(b)
+    out = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        begin = max(a[i][0], b[j][0])
+        end = min(a[i][1], b[j][1])
+        if begin < end:
+            out.append((begin, end))
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return out
+
+
+def difference(a, b):
+    """Give the parts of ``a`` that are not covered by ``b`` in ``O(n+m)``.
+
+    :param list a: Intervals sorted on begin time.
+    :param list b: Intervals sorted on begin time.
+    :returns: Sorted list of disjoint intervals.
+    """
+    b = merge(b)
+    out = []
+    j = 0
+    for begin, end in merge(a):
+        while j < len(b) and b[j][1] <= begin:
+            j += 1
+        k = j
+        while k < len(b) and b[k][0] < end:
+            if b[k][0] > begin:
+                out.append((begin, b[k][0]))
+            begin = max(begin, b[k][1])
+            k += 1
+        if begin < end:
+            out.append((begin, end))
+    return out
+
+
+def complement(a, start, end):
+    """Give the parts of ``[start, end]`` that are not covered by ``a``.
+
+    :param list a: Intervals sorted on begin time.
+    :param start: Start of the full interval.
+    :param end: End of the full interval.
+    :returns: Sorted list of disjoint intervals.
+    """
+    return difference([(start, end)], a) if start < end else []
+
+
+def join(a, b, how='inner', min_overlap=0):
+    """Join two lists of intervals on overlap with a sort-merge sweep, this
+    runs in ``O((n+m) log(n+m) + output)`` for tiers without long nested
+    intervals. The intervals can have extra elements such as the value, only
+    the first two elements are used as ``(begin, end)``.
+
+    +-------+--------------------------------------------------------+
+    | how   | Description                                            |
+    +=======+========================================================+
+    | inner | All overlapping pairs.                                 |
+    +-------+--------------------------------------------------------+
+    | left  | All overlapping pairs and ``(x, None, 0)`` for every   |
+    |       | interval in ``a`` without an overlapping interval.     |
+    +-------+--------------------------------------------------------+
+    | anti  | Only ``(x, None, 0)`` for every interval in ``a``      |
+    |       | without an overlapping interval.                       |
+    +-------+--------------------------------------------------------+
+
+    :param list a: Left intervals.
+    :param list b: Right intervals.
+    :param str how: Type of join, one of ``inner``, ``left`` or ``anti``.
+    :param min_overlap: Minimal overlap for a pair to match, pairs always
+        need a strictly positive overlap.
+    :returns: Generator of tuples of the form: ``(x, y, overlap)`` in order
+        of ``a`` and then ``b``.
+    :raises ValueError: If the type of join is unknown, this is checked
+        before the generator is returned.
+    """
+    if how not in ('inner', 'left', 'anti'):
+        raise ValueError('how has to be one of inner, left or anti')
+    return _join(a, b, how, min_overlap)
+
+
+def _join(a, b, how, min_overlap):
+    """Generator for :func:`join`.
+
+    :param list a: Left intervals.
+    :param list b: Right intervals.
+    :param str how: Type of join.
+    :param min_overlap: Minimal overlap for a pair to match.
+    :yields: Tuples of the form: ``(x, y, overlap)`` in order of ``a``.
+    """
+    a = sorted(a, key=lambda x: (x[0], x[1]))
+    b = sorted(b, key=lambda x: (x[0], x[1]))
+    # Heap of the started intervals of b keyed on their end, so the ended
+    # ones are evicted from the top, the position breaks ties
+    active = []
+    j = 0
+    for x in a:
+        while j < len(b) and b[j][0] < x[1]:
+            heapq.heappush(active, (b[j][1], j, b[j]))
+            j += 1
+        while active and active[0][0] <= x[0]:
+            heapq.heappop(active)
+        matches = []
+        for _, k, y in active:
+            overlap = min(x[1], y[1]) - max(x[0], y[0])
+            if overlap > 0 and overlap >= min_overlap:
+                matches.append((k, y, overlap))
+                if how == 'anti':
+                    break
+        if how != 'anti':
+            matches.sort(key=lambda m: m[0])
+            for _, y, overlap in matches:
+                yield (x, y, overlap)
+        if not matches and how != 'inner':
+            yield (x, None, 0)
+
+
+def frames(tiers, start, end, hop, binary=False):
+    """Sample tiers at a fixed hop size into a frame matrix using binary
+    search over the sorted boundaries instead of a scan per frame. Frame
+    ``i`` starts at ``start+i*hop`` and is labelled with the interval that
+    contains its start time, intervals are half open: ``[begin, end)``. When
+    intervals of a tier overlap the most recently started interval that
+    contains the start time is used for the label codes.
+
+    .. note:: This function requires :mod:`numpy`.
+
+    :param list tiers: Lists of intervals of the form: ``[(begin, end,
+        value)]``, one list for every column.
+    :param start: Start time of the first frame.
+    :param end: End time, the last frame starts before this time.
+    :param hop: Hop size, in the same unit as the times.
+    :param bool binary: Flag to give a boolean matrix that only marks the
+        presence of an interval instead of label codes.
+    :returns: Tuple of the form: ``(matrix, vocabulary)`` where matrix has a
+        row for every frame and a column for every tier. The label codes
+        index the vocabulary, code ``0`` means no interval and has value
+        ``None``. For binary matrices the vocabulary is ``None``.
+    :raises ImportError: If numpy can't be loaded.
+    :raises ValueError: If the hop size is not strictly positive.
+    """
+    import numpy
+    if hop <= 0:
+        raise ValueError('Hop size should be strictly positive')
+    times = start + hop*numpy.arange(max(0, int(numpy.ceil(
+        (end-start)/float(hop)))))
+    matrix = numpy.zeros((len(times), len(tiers)),
+                         dtype=bool if binary else numpy.int32)
+    vocabulary = None if binary else [None]
+    codes = {}
+    for column, intervals in enumerate(tiers):
+        intervals = sorted(intervals, key=lambda x: (x[0], x[1]))
+        if not intervals:
+            continue
+        begins = numpy.array([x[0] for x in intervals], dtype=float)
+        ends = numpy.array([x[1] for x in intervals], dtype=float)
+        if binary:
+            ends.sort()
+            matrix[:, column] = numpy.searchsorted(begins, times, 'right') >\
+                numpy.searchsorted(ends, times, 'right')
+            continue
+        labels = numpy.empty(len(intervals), dtype=numpy.int32)
+        for i, x in enumerate(intervals):
+            if x[2] not in codes:
+                codes[x[2]] = len(vocabulary)
+                vocabulary.append(x[2])
+            labels[i] = codes[x[2]]
+        # Previous interval with a later end, when the last started interval
+        # has ended the frame can only be in such an earlier interval
+        previous = numpy.empty(len(intervals), dtype=numpy.intp)
+        stack = []
+        for i, end2 in enumerate(ends.tolist()):
+            while stack and ends[stack[-1]] <= end2:
+                stack.pop()
+            previous[i] = stack[-1] if stack else -1
+            stack.append(i)
+        index = numpy.searchsorted(begins, times, 'right') - 1
+        while True:
+            ended = index >= 0
+            ended[ended] = times[ended] >= ends[index[ended]]
+            if not ended.any():
+                break
+            index[ended] = previous[index[ended]]
+        valid = index >= 0
+        matrix[valid, column] = labels[index[valid]]
+    return matrix, vocabulary
@@ -1,12 +1,142 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+from pympi import Intervals
+import bisect
 import codecs
+import heapq
+import mmap
+import os
+import pickle
 import re
 import struct
 
 VERSION = '1.69'
 
+DOUBLE = struct.Struct('>d')
+DOUBLES = struct.Struct('>dd')
+INT = struct.Struct('>i')
+INTERVAL = struct.Struct('>ddh')
+SHORT = struct.Struct('>h')
+CHUNK = 8192
+TEXT_NORMAL = {
+    'header': u'File type = "ooTextFile"\nObject class = "TextGrid"\n\n'
+              u'xmin = {:f}\nxmax = {:f}\ntiers? <exists>\nsize = {}\n'
+              u'item []:\n',
+    'tier': u'    item [{:d}]:\n        class = "{}"\n        name = "{}"\n'
+            u'        xmin = {:f}\n        xmax = {:f}\n'
+            u'        {}: size = {}\n',
+    'IntervalTier': u'        intervals [{:d}]:\n            xmin = {:f}\n'
+                    u'            xmax = {:f}\n            text = "{}"\n',
+    'TextTier': u'        points [{:d}]:\n            number = {:f}\n'
+                u'            mark = "{}"\n'}
+TEXT_SHORT = {
+    'header': u'File type = "ooTextFile"\nObject class = "TextGrid"\n\n'
+              u'{:f}\n{:f}\n<exists>\n{}\n',
+    'tier': u'"{1}"\n"{2}"\n{3:f}\n{4:f}\n{6}\n',
+    'IntervalTier': u'{1:f}\n{2:f}\n"{3}"\n',
+    'TextTier': u'{1:f}\n"{2}"\n'}
+CHRONOLOGICAL = 'Praat chronological TextGrid text file'
+TIER_HEADER = re.compile(
+    br'item \[\d+\]:\s+class = "([^"]*)"\s+name = "((?:[^"]|"")*)"\s+'
+    br'xmin = (\S+)\s+xmax = (\S+)\s+(?:intervals|points): size = (\d+)')
+STRING = re.compile(r'"((?:[^"]|"")*)"')
+COMMENT = re.compile(r'![^\n]*')
+
+
+def binary_string(value):
+    """Give the binary TextGrid representation of a string, ascii strings
+    are stored as is and other strings as utf-16.
+
+    :param str value: The string.
+    :returns: The encoded string including the length.
+    """
+    try:
+        return SHORT.pack(len(value)) + value.encode('ascii')
+    except UnicodeError:
+        value = value.encode('utf-16-be')
+        return b'\xff\xff' + SHORT.pack(len(value)//2) + value
+
+
+def _binary_string(data, p):
+    """Decode a string of a binary TextGrid.
+
+    :param data: Contents of the file.
+    :param int p: Offset of the string.
+    :returns: Tuple of the form: ``(string, offset after the string)``.
+    """
+    length = SHORT.unpack_from(data, p)[0]
+    # Multi byte strings have an initial length of -1
+    if length == -1:
+        length = 2*SHORT.unpack_from(data, p+2)[0]
+        return data[p+4:p+4+length].decode('utf-16-be'), p+4+length
+    return data[p+2:p+2+length].decode('ascii'), p+2+length
+
+
+def _binary_items(data, p, n, tier_type):
+    """Decode the intervals or points of a tier in a binary TextGrid.
+
+    :param data: Contents of the file.
+    :param int p: Offset of the first item.
+    :param int n: Number of items.
+    :param str tier_type: Type of the tier.
+    :returns: Tuple of the form: ``(items, offset after the items)``.
+    """
+    items = []
+    append = items.append
+    if tier_type == 'IntervalTier':
+        unpack = INTERVAL.unpack_from
+        for j in range(n):
+            x1, x2, length = unpack(data, p)
+            if length == -1:
+                text, p = _binary_string(data, p+16)
+            else:
+                p += 18+length
+                text = data[p-length:p].decode('ascii')
+            append((x1, x2, text))
+    else:
+        for j in range(n):
+            x1 = DOUBLE.unpack_from(data, p)[0]
+            text, p = _binary_string(data, p+8)
+            append((x1, text))
+    return items, p
+
+
+def _text_items(tokens, strings, tier_type):
+    """Build the intervals or points of a tier from text tokens, the times
+    are converted in bulk.
+
+    :param list tokens: Times of the items, see :func:`tokenize`.
+    :param list strings: Texts of the items.
+    :param str tier_type: Type of the tier.
+    :returns: List of items.
+    """
+    if tier_type == 'IntervalTier':
+        return list(zip(map(float, tokens[0::3]), map(float, tokens[1::3]),
+                        strings))
+    return list(zip(map(float, tokens[0::2]), strings))
+
+
+def tokenize(text):
+    """Split the text formats into tokens. The strings are split off with one
+    regular expression and the rest is split on whitespace at once, labels,
+    ``[n]`` indices and ``!`` comments are skipped. This way the layout of
+    the file doesn't matter and strings can contain doubled quotes and span
+    multiple lines.
+
+    :param str text: Text to split, this should not end within a token.
+    :returns: Tuple of the form: ``(tokens, strings)`` where tokens holds the
+        numbers and flags in order and a ``"`` for every string, the strings
+        with the doubled quotes undone are in strings.
+    """
+    parts = STRING.split(text)
+    strings = [x.replace('""', '"') for x in parts[1::2]]
+    other = parts[0::2]
+    if any('!' in x for x in other):
+        other = [COMMENT.sub('', x) for x in other]
+    return [x for x in ' " '.join(other).split()
+            if x[0] in '0123456789+-.<"'], strings
+
 
 class TextGrid:
     """Read write and edit Praat's TextGrid files.
@@ -16,15 +146,27 @@ class TextGrid:
     :var float xmin: Minimum x value.
     :var float xmax: Maximum x value.
     :var int tier_num: Number of tiers.
-    :var list tiers: Internal (unsorted) list of tiers.
+    :var list tiers: Internal (unsorted) list of tiers. When you change this
+        list directly call :func:`index_tiers` afterwards.
     :var str codec: Codec of the input file.
+    :var dict tier_index: Positions of the tiers by name of the form:
+        ``{name -> [positions]}`` where the positions are sorted indices in
+        the tiers list, this is only used internally.
     """
-    def __init__(self, file_path=None, xmin=0, xmax=None, codec='utf-8'):
+    def __init__(self, file_path=None, xmin=0, xmax=None, codec='utf-8',
+                 lazy=False, index_path=None):
         """Construct either a new TextGrid object or read one from a
         file/stream. When you create an empty TextGrid you must at least
         specify the xmax. When you want to load a TextGrid from file you need
         to specify at least the file_path and optionally the codec. Binary,
-        short and normal TextGrids are supported.
+        short, chronological and normal TextGrids are supported.
+
+        When loading lazily the file is only skimmed for the offsets of the
+        tiers and the intervals of a tier are read when they are first used.
+        This is supported for binary TextGrids and normal TextGrids in an
+        ascii compatible codec, other files are loaded directly. The offsets
+        can be stored in a sidecar index so that reopening doesn't need to
+        skim the file again.
 
         :param str file_path: Path to read from, - for stdin. If ``None`` an
                               empty TextGrid will be created.
@@ -32,9 +174,14 @@ class TextGrid:
         :param int xmax: Xmax value, needed when not loading from file.
         :param str codec: Text encoding for the input. Note that this will be
             ignored for binary TextGrids.
+        :param bool lazy: Flag to load the tiers lazily.
+        :param str index_path: Path of the sidecar index, it is used when it
+            matches the size and modification time of the file and written
+            otherwise. Giving an index implies lazy loading.
         :raises Exception: If filepath is not specified but no xmax
         """
         self.tiers = []
+        self.tier_index = {}
         self.codec = codec
         if not file_path:
             if xmax is None:
@@ -42,6 +189,9 @@ class TextGrid:
             self.tier_num = 0
             self.xmin = xmin
             self.xmax = xmax
+        elif lazy or index_path:
+            self._load_lazy(file_path, codec, index_path)
+            self.index_tiers()
         else:
             with open(file_path, 'rb') as f:
                 self.from_file(f, codec)
@@ -53,81 +203,166 @@ class TextGrid:
         :param str codec: Text encoding for the input. Note that this will be
             ignored for binary TextGrids.
         """
-        if ifile.read(12) == b'ooBinaryFile':
-            def bin2str(ifile):
-                textlen = struct.unpack('>h', ifile.read(2))[0]
-                # Single byte characters
-                if textlen >= 0:
-                    return ifile.read(textlen).decode('ascii')
-                # Multi byte characters have initial len -1 and then \xff bytes
-                elif textlen == -1:
-                    textlen = struct.unpack('>h', ifile.read(2))[0]
-                    data = ifile.read(textlen*2)
-                    # Hack to go from number to unicode in python3 and python2
-                    fun = unichr if 'unichr' in __builtins__ else chr
-                    charlist = (data[i:i+2] for i in range(0, len(data), 2))
-                    return u''.join(
-                        fun(struct.unpack('>h', i)[0]) for i in charlist)
-
-            ifile.read(ord(ifile.read(1)))  # skip oo type
-            self.xmin = struct.unpack('>d', ifile.read(8))[0]
-            self.xmax = struct.unpack('>d', ifile.read(8))[0]
-            ifile.read(1)  # skip <exists>
-            self.tier_num = struct.unpack('>i', ifile.read(4))[0]
-            for i in range(self.tier_num):
-                tier_type = ifile.read(ord(ifile.read(1))).decode('ascii')
-                name = bin2str(ifile)
-                tier = Tier(0, 0, name=name, tier_type=tier_type)
-                self.tiers.append(tier)
-                tier.xmin = struct.unpack('>d', ifile.read(8))[0]
-                tier.xmax = struct.unpack('>d', ifile.read(8))[0]
-                nint = struct.unpack('>i', ifile.read(4))[0]
-                for i in range(nint):
-                    x1 = struct.unpack('>d', ifile.read(8))[0]
-                    if tier.tier_type == 'IntervalTier':
-                        x2 = struct.unpack('>d', ifile.read(8))[0]
-                    text = bin2str(ifile)
-                    if tier.tier_type == 'IntervalTier':
-                        tier.intervals.append((x1, x2, text))
-                    elif tier.tier_type == 'TextTier':
-                        tier.intervals.append((x1, text))
-                    else:
-                        raise Exception('Tiertype does not exist.')
+        header = ifile.read(12)
+        if header == b'ooBinaryFile':
+            self._read_binary(header + ifile.read())
         else:
-            def nn(ifile, pat):
-                line = next(ifile).decode(codec)
-                return pat.search(line).group(1)
-
-            regfloat = re.compile('([\d.]+)\s*$', flags=re.UNICODE)
-            regint = re.compile('([\d]+)\s*$', flags=re.UNICODE)
-            regstr = re.compile('"(.*)"\s*$', flags=re.UNICODE)
-            # Skip the Headers and empty line
-            next(ifile), next(ifile), next(ifile)
-            self.xmin = float(nn(ifile, regfloat))
-            self.xmax = float(nn(ifile, regfloat))
-            # Skip <exists>
-            line = next(ifile)
-            short = line.strip() == b'<exists>'
-            self.tier_num = int(nn(ifile, regint))
-            not short and next(ifile)
-            for i in range(self.tier_num):
-                not short and next(ifile)  # skip item[]: and item[\d]:
-                tier_type = nn(ifile, regstr)
-                name = nn(ifile, regstr)
-                tier = Tier(0, 0, name=name, tier_type=tier_type)
-                self.tiers.append(tier)
-                tier.xmin = float(nn(ifile, regfloat))
-                tier.xmax = float(nn(ifile, regfloat))
-                for i in range(int(nn(ifile, regint))):
-                    not short and next(ifile)  # skip intervals [\d]
-                    x1 = float(nn(ifile, regfloat))
-                    if tier.tier_type == 'IntervalTier':
-                        x2 = float(nn(ifile, regfloat))
-                        t = nn(ifile, regstr)
-                        tier.intervals.append((x1, x2, t))
-                    elif tier.tier_type == 'TextTier':
-                        t = nn(ifile, regstr)
-                        tier.intervals.append((x1, t))
+            self._read_text(header + ifile.read(), codec)
+        self.index_tiers()
+
+    def _load_lazy(self, file_path, codec, index_path):
+        """Skim a file for the offsets of the tiers or read them from the
+        sidecar index, see :func:`__init__`.
+
+        :param str file_path: Path of the file.
+        :param str codec: Text encoding for the input.
+        :param str index_path: Path of the sidecar index or ``None``.
+        """
+        stat = os.stat(file_path)
+        if index_path and os.path.exists(index_path):
+            with open(index_path, 'rb') as f:
+                index = pickle.load(f)
+            if index['stat'] == (stat.st_size, stat.st_mtime) and\
+                    index['codec'] == codec:
+                self.xmin, self.xmax = index['xmin'], index['xmax']
+                for name, tier_type, xmin, xmax, source in index['tiers']:
+                    self.tiers.append(Tier(xmin, xmax, name, tier_type))
+                    self.tiers[-1].source = (file_path,) + source
+                self.tier_num = len(self.tiers)
+                return
+        with open(file_path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                if data[:12] == b'ooBinaryFile':
+                    self._read_binary(data, file_path)
+                elif not TIER_HEADER.search(data) or\
+                        codecs.lookup(codec).name.startswith('utf-16') or\
+                        data[:2] in (codecs.BOM_UTF16_BE,
+                                     codecs.BOM_UTF16_LE):
+                    self._read_text(data[:], codec)
+                    return
+                else:
+                    self._skim_text(data, file_path, codec)
+            finally:
+                data.close()
+        if index_path:
+            with open(index_path, 'wb') as f:
+                pickle.dump({
+                    'stat': (stat.st_size, stat.st_mtime), 'codec': codec,
+                    'xmin': self.xmin, 'xmax': self.xmax,
+                    'tiers': [(t.name, t.tier_type, t.xmin, t.xmax,
+                               t.source[1:]) for t in self.tiers]}, f)
+
+    def _read_binary(self, data, file_path=None):
+        """Parse the binary format from a buffer. The numbers are unpacked
+        in place with precompiled structs, an interval and the length of its
+        text with one call, and the strings are decoded with a single call.
+
+        :param bytes data: Contents of the file.
+        :param str file_path: Path of the file, when given the intervals are
+            skipped and only their offsets are stored for lazy loading.
+        """
+        p = 13 + bytearray(data[12:13])[0]  # skip oo type
+        self.xmin, self.xmax = DOUBLES.unpack_from(data, p)
+        self.tier_num = INT.unpack_from(data, p+17)[0]  # skip <exists>
+        p += 21
+        for i in range(self.tier_num):
+            length = bytearray(data[p:p+1])[0]
+            tier_type = data[p+1:p+1+length].decode('ascii')
+            name, p = _binary_string(data, p+1+length)
+            tier = Tier(0, 0, name=name, tier_type=tier_type)
+            self.tiers.append(tier)
+            tier.xmin, tier.xmax = DOUBLES.unpack_from(data, p)
+            n = INT.unpack_from(data, p+16)[0]
+            if file_path is None:
+                tier.intervals, p = _binary_items(data, p+20, n, tier_type)
+                tier.intervals.sort()
+                continue
+            start = p = p+20
+            width = 16 if tier_type == 'IntervalTier' else 8
+            for j in range(n):
+                length = SHORT.unpack_from(data, p+width)[0]
+                p += width + (4+2*SHORT.unpack_from(data, p+width+2)[0]
+                              if length == -1 else 2+length)
+            tier.source = (file_path, 'b', None, start, p, n)
+
+    def _skim_text(self, data, file_path, codec):
+        """Skim a normal text TextGrid for the offsets of the tiers with one
+        regular expression over the raw bytes.
+
+        :param data: Contents of the file as bytes or a memory map.
+        :param str file_path: Path of the file.
+        :param str codec: Text encoding of the file.
+        """
+        matches = list(TIER_HEADER.finditer(data))
+        tokens = tokenize(data[:matches[0].start()].decode(codec))[0]
+        self.xmin, self.xmax = float(tokens[2]), float(tokens[3])
+        self.tier_num = len(matches)
+        for i, m in enumerate(matches):
+            end = matches[i+1].start() if i+1 < len(matches) else len(data)
+            tier = Tier(float(m.group(3)), float(m.group(4)),
+                        m.group(2).decode(codec).replace('""', '"'),
+                        m.group(1).decode(codec))
+            tier.source = (file_path, 'n', codec, m.end(), end,
+                           int(m.group(5)))
+            self.tiers.append(tier)
+
+    def _read_text(self, data, codec):
+        """Parse the normal, short or chronological text format from a
+        buffer, see :func:`tokenize`.
+
+        :param bytes data: Contents of the file.
+        :param str codec: Text encoding of the file, a byte order mark
+            overrides it.
+        """
+        if data[:2] in (codecs.BOM_UTF16_BE, codecs.BOM_UTF16_LE):
+            codec = 'utf-16'
+        tokens, strings = tokenize(data.decode(codec))
+        if strings and strings[0] == CHRONOLOGICAL:
+            return self._read_chronological(tokens, strings)
+        self.xmin = float(tokens[2])
+        self.xmax = float(tokens[3])
+        self.tier_num = int(tokens[5]) if tokens[4] == '<exists>' else 0
+        p, k = 6, 2
+        for i in range(self.tier_num):
+            tier = Tier(float(tokens[p+2]), float(tokens[p+3]),
+                        strings[k+1], strings[k])
+            self.tiers.append(tier)
+            n = int(tokens[p+4])
+            p, k = p+5, k+2
+            width = 3 if tier.tier_type == 'IntervalTier' else 2
+            tier.intervals = _text_items(tokens[p:p+width*n], strings[k:k+n],
+                                         tier.tier_type)
+            p, k = p+width*n, k+n
+            tier.intervals.sort()
+
+    def _read_chronological(self, tokens, strings):
+        """Parse the chronological text format where the intervals of all
+        tiers are interleaved in time order and prefixed with their tier
+        number.
+
+        :param list tokens: Tokens, see :func:`tokenize`.
+        :param list strings: Strings, see :func:`tokenize`.
+        """
+        self.xmin, self.xmax = float(tokens[1]), float(tokens[2])
+        self.tier_num = int(tokens[3])
+        p, k = 4, 1
+        for i in range(self.tier_num):
+            self.tiers.append(Tier(float(tokens[p+2]), float(tokens[p+3]),
+                                   strings[k+1], strings[k]))
+            p, k = p+4, k+2
+        while p < len(tokens):
+            tier = self.tiers[int(tokens[p])-1]
+            if tier.tier_type == 'IntervalTier':
+                tier.intervals.append((float(tokens[p+1]),
+                                       float(tokens[p+2]), strings[k]))
+                p += 4
+            else:
+                tier.intervals.append((float(tokens[p+1]), strings[k]))
+                p += 3
+            k += 1
+        for tier in self.tiers:
+            tier.intervals.sort()
 
     def sort_tiers(self, key=lambda x: x.name):
         """Sort the tiers given the key. Example key functions:
@@ -143,6 +378,53 @@ class TextGrid:
         :param func key: A key function. Default sorts alphabetically.
         """
         self.tiers.sort(key=key)
+        self.index_tiers()
+
+    def index_tiers(self):
+        """Rebuild the index of the tiers on name. The methods of this class
+        keep the index up to date and so does renaming a tier, but when you
+        change the tiers list directly you have to call this afterwards.
+        """
+        self.tier_index = {}
+        for i, tier in enumerate(self.tiers):
+            tier.grid = self
+            self.tier_index.setdefault(tier.name, []).append(i)
+
+    def _shift_index(self, start, delta):
+        """Shift the indexed positions from a position on, this is needed
+        when a tier is inserted or removed before the end.
+
+        :param int start: First position to shift.
+        :param int delta: Amount to shift.
+        """
+        for positions in self.tier_index.values():
+            if positions[-1] >= start:
+                k = bisect.bisect_left(positions, start)
+                positions[k:] = [i+delta for i in positions[k:]]
+
+    def _rename_tier(self, tier, name):
+        """Move a tier to a new name in the index, this is called when the
+        name of a tier of this TextGrid is set.
+
+        :param pympi.Praat.Tier tier: The tier.
+        :param str name: The old name of the tier.
+        """
+        positions = self.tier_index.get(name, [])
+        for k, i in enumerate(positions):
+            if self.tiers[i] is tier:
+                del(positions[k])
+                if not positions:
+                    del(self.tier_index[name])
+                bisect.insort(self.tier_index.setdefault(tier.name, []), i)
+                break
+
+    def get_tiers_by_name(self, name):
+        """Give all tiers with a name in order using the name index.
+
+        :param str name: Name of the tiers.
+        :returns: List of tiers, empty if there is no tier with that name.
+        """
+        return [self.tiers[i] for i in self.tier_index.get(name, [])]
 
     def add_tier(self, name, tier_type='IntervalTier', number=None):
         """Add an IntervalTier or a TextTier on the specified location.
@@ -150,7 +432,8 @@ class TextGrid:
         :param str name: Name of the tier, duplicate names is allowed.
         :param str tier_type: Type of the tier.
         :param int number: Place to insert the tier, when ``None`` the number
-            is generated and the tier will be placed on the bottom.
+            is generated and the tier will be placed on the bottom. Inserting
+            before the bottom shifts the positions in the name index.
         :returns: The created tier.
         :raises ValueError: If the number is out of bounds.
         """
@@ -160,34 +443,51 @@ class TextGrid:
             raise ValueError('Number not in [1..{}]'.format(len(self.tiers)))
         elif tier_type not in Tier.P_TIERS:
             raise ValueError('tier_type has to be in {}'.format(self.P_TIERS))
-        self.tiers.insert(number-1,
-                          Tier(self.xmin, self.xmax, name, tier_type))
-        return self.tiers[number-1]
+        tier = Tier(self.xmin, self.xmax, name, tier_type)
+        if number <= len(self.tiers):
+            self._shift_index(number-1, 1)
+        self.tiers.insert(number-1, tier)
+        bisect.insort(self.tier_index.setdefault(name, []), number-1)
+        tier.grid = self
+        return tier
 
     def remove_tier(self, name_num):
-        """Remove a tier, when multiple tiers exist with that name only the
-        first is removed.
+        """Remove a tier, when multiple tiers exist with that name all of
+        them are removed.
 
         :param name_num: Name or number of the tier to remove.
         :type name_num: int or str
         :raises IndexError: If there is no tier with that number.
         """
         if isinstance(name_num, int):
-            del(self.tiers[name_num-1])
-        else:
+            i = range(len(self.tiers))[name_num-1]
+            tier = self.tiers.pop(i)
+            positions = self.tier_index[tier.name]
+            positions.remove(i)
+            if not positions:
+                del(self.tier_index[tier.name])
+            self._shift_index(i+1, -1)
+            tier.grid = None
+        elif name_num in self.tier_index:
+            for i in self.tier_index[name_num]:
+                self.tiers[i].grid = None
             self.tiers = [i for i in self.tiers if i.name != name_num]
+            self.index_tiers()
 
     def get_tier(self, name_num):
         """Gives a tier, when multiple tiers exist with that name only the
-        first is returned.
+        first is returned. Tiers are found by name with the name index.
 
         :param name_num: Name or number of the tier to return.
         :type name_num: int or str
         :returns: The tier.
         :raises IndexError: If the tier doesn't exist.
         """
-        return self.tiers[name_num - 1] if isinstance(name_num, int) else\
-            [i for i in self.tiers if i.name == name_num][0]
+        if isinstance(name_num, int):
+            return self.tiers[name_num - 1]
+        if name_num not in self.tier_index:
+            raise IndexError('Tier {} does not exist'.format(name_num))
+        return self.tiers[self.tier_index[name_num][0]]
 
     def change_tier_name(self, name_num, name2):
         """Changes the name of the tier, when multiple tiers exist with that
@@ -216,93 +516,207 @@ class TextGrid:
         return enumerate((s.name for s in self.tiers), 1)
 
     def to_file(self, filepath, codec='utf-8', mode='normal'):
-        """Write the object to a file.
+        """Write the object to a file. The output is assembled with
+        precompiled formats and written in large chunks.
 
         :param str filepath: Path of the fil.
         :param str codec: Text encoding.
         :param string mode: Flag to for write mode, possible modes:
-            'n'/'normal', 's'/'short' and 'b'/'binary'
+            'n'/'normal', 's'/'short', 'c'/'chronological' and 'b'/'binary'
         """
         self.tier_num = len(self.tiers)
+        # Tiers that are not loaded yet are read before the file is truncated
+        if os.path.exists(filepath):
+            for tier in self.tiers:
+                if tier.source is not None and\
+                        os.path.exists(tier.source[0]) and\
+                        os.path.samefile(tier.source[0], filepath):
+                    tier.intervals
         if mode in ['binary', 'b']:
             with open(filepath, 'wb') as f:
-                def writebstr(s):
-                    try:
-                        bstr = s.encode('ascii')
-                    except UnicodeError:
-                        f.write(b'\xff\xff')
-                        bstr = b''.join(struct.pack('>h', ord(c)) for c in s)
-                    f.write(struct.pack('>h', len(s)))
-                    f.write(bstr)
-
-                f.write(b'ooBinaryFile\x08TextGrid')
-                f.write(struct.pack('>d', self.xmin))
-                f.write(struct.pack('>d', self.xmax))
-                f.write(b'\x01')
-                f.write(struct.pack('>i', self.tier_num))
-                for tier in self.tiers:
-                    f.write(chr(len(tier.tier_type)).encode('ascii'))
-                    f.write(tier.tier_type.encode('ascii'))
-                    writebstr(tier.name)
-                    f.write(struct.pack('>d', tier.xmin))
-                    f.write(struct.pack('>d', tier.xmax))
-                    ints = tier.get_all_intervals()
-                    f.write(struct.pack('>i', len(ints)))
-                    itier = tier.tier_type == 'IntervalTier'
-                    for c in ints:
-                        f.write(struct.pack('>d', c[0]))
-                        itier and f.write(struct.pack('>d', c[1]))
-                        writebstr(c[2 if itier else 1])
+                self._write_binary(f)
         elif mode in ['normal', 'n', 'short', 's']:
-            with codecs.open(filepath, 'w', codec) as f:
-                short = mode[0] == 's'
-
-                def wrt(indent, prefix, value, ff=''):
-                    indent = 0 if short else indent
-                    prefix = '' if short else prefix
-                    if value is not None or not short:
-                        s = u'{{}}{{}}{}\n'.format(ff)
-                        f.write(s.format(' '*indent, prefix, value))
-
-                f.write(u'File type = "ooTextFile"\n'
-                        u'Object class = "TextGrid"\n\n')
-                wrt(0, u'xmin = ', self.xmin, '{:f}')
-                wrt(0, u'xmax = ', self.xmax, '{:f}')
-                wrt(0, u'tiers? ', u'<exists>', '{}')
-                wrt(0, u'size = ', self.tier_num, '{:d}')
-                wrt(0, u'item []:', None)
-                for tnum, tier in enumerate(self.tiers, 1):
-                    wrt(4, u'item [{:d}]:'.format(tnum), None)
-                    wrt(8, u'class = ', tier.tier_type, '"{}"')
-                    wrt(8, u'name = ', tier.name, '"{}"')
-                    wrt(8, u'xmin = ', tier.xmin, '{:f}')
-                    wrt(8, u'xmax = ', tier.xmax, '{:f}')
-                    if tier.tier_type == 'IntervalTier':
-                        ints = tier.get_all_intervals()
-                        wrt(8, u'intervals: size = ', len(ints), '{:d}')
-                        for i, c in enumerate(ints):
-                            wrt(8, 'intervals [{:d}]:'.format(i+1), None)
-                            wrt(12, 'xmin = ', c[0], '{:f}')
-                            wrt(12, 'xmax = ', c[1], '{:f}')
-                            wrt(12, 'text = ', c[2].replace('"', '""'), '"{}"')
-                    elif tier.tier_type == 'TextTier':
-                        wrt(8, u'points: size = ', len(tier.intervals), '{:d}')
-                        for i, c in enumerate(tier.get_intervals()):
-                            wrt(8, 'points [{:d}]:'.format(i+1), None)
-                            wrt(12, 'number = ', c[0], '{:f}')
-                            wrt(12, 'mark = ', c[1].replace('"', '""'), '"{}"')
+            with open(filepath, 'wb') as f:
+                self._write_text(f, codec, mode[0] == 's')
+        elif mode in ['chronological', 'c']:
+            with open(filepath, 'wb') as f:
+                self._write_chronological(f, codec)
         else:
             raise Exception('Unknown mode')
 
-    def to_eaf(self, skipempty=True, pointlength=0.1):
-        """Convert the object to an pympi.Elan.Eaf object
+    def _write_binary(self, f):
+        """Write the binary format to a stream.
+
+        :param file f: Stream opened in binary mode.
+        """
+        out = [b'ooBinaryFile\x08TextGrid',
+               DOUBLES.pack(self.xmin, self.xmax), b'\x01',
+               INT.pack(self.tier_num)]
+        for tier in self.tiers:
+            out.append(bytes(bytearray([len(tier.tier_type)])) +
+                       tier.tier_type.encode('ascii'))
+            out.append(binary_string(tier.name))
+            out.append(DOUBLES.pack(tier.xmin, tier.xmax))
+            ints = tier.get_all_intervals()
+            out.append(INT.pack(len(ints)))
+            if tier.tier_type == 'IntervalTier':
+                for c in ints:
+                    out.append(DOUBLES.pack(c[0], c[1]))
+                    out.append(binary_string(c[2]))
+                    if len(out) >= CHUNK:
+                        f.write(b''.join(out))
+                        del(out[:])
+            else:
+                for c in ints:
+                    out.append(DOUBLE.pack(c[0]))
+                    out.append(binary_string(c[1]))
+                    if len(out) >= CHUNK:
+                        f.write(b''.join(out))
+                        del(out[:])
+        f.write(b''.join(out))
+
+    def _write_text(self, f, codec, short):
+        """Write the normal or short text format to a stream.
+
+        :param file f: Stream opened in binary mode.
+        :param str codec: Text encoding.
+        :param bool short: Flag to write the short format.
+        """
+        encode = codecs.getincrementalencoder(codec)().encode
+        formats = TEXT_SHORT if short else TEXT_NORMAL
+        out = [formats['header'].format(self.xmin, self.xmax, self.tier_num)]
+        for tnum, tier in enumerate(self.tiers, 1):
+            ints = tier.get_all_intervals()
+            out.append(formats['tier'].format(
+                tnum, tier.tier_type, tier.name.replace('"', '""'),
+                tier.xmin, tier.xmax, 'intervals' if tier.tier_type ==
+                'IntervalTier' else 'points', len(ints)))
+            form = formats[tier.tier_type]
+            for i, c in enumerate(ints, 1):
+                out.append(form.format(i, *c[:-1] + (c[-1].replace(
+                    '"', '""'),)))
+                if len(out) >= CHUNK:
+                    f.write(encode(u''.join(out)))
+                    del(out[:])
+        f.write(encode(u''.join(out), True))
+
+    def _write_chronological(self, f, codec):
+        """Write the chronological text format to a stream, the intervals of
+        all tiers are interleaved with a k-way merge on time.
+
+        :param file f: Stream opened in binary mode.
+        :param str codec: Text encoding.
+        """
+        def items(number, tier):
+            for item in tier.iter_all_intervals():
+                yield (item[0], number, item)
+
+        encode = codecs.getincrementalencoder(codec)().encode
+        out = [u'"{}"\n{:f} {:f}   ! Time domain.\n{:d}   ! Number of tiers.'
+               u'\n'.format(CHRONOLOGICAL, self.xmin, self.xmax,
+                            self.tier_num)]
+        for tier in self.tiers:
+            out.append(u'"{}" "{}" {:f} {:f}\n'.format(
+                tier.tier_type, tier.name.replace('"', '""'), tier.xmin,
+                tier.xmax))
+        for _, number, item in heapq.merge(
+                *[items(n, t) for n, t in enumerate(self.tiers, 1)]):
+            if len(item) == 3:
+                out.append(u'\n{:d} {:f} {:f}\n"{}"'.format(
+                    number, item[0], item[1], item[2].replace('"', '""')))
+            else:
+                out.append(u'\n{:d} {:f}\n"{}"'.format(
+                    number, item[0], item[1].replace('"', '""')))
+            if len(out) >= CHUNK:
+                f.write(encode(u''.join(out)))
+                del(out[:])
+        out.append(u'\n')
+        f.write(encode(u''.join(out), True))
+
+    def to_frames(self, tiers=None, hop=0.01, binary=False, start=None,
+                  end=None):
+        """Convert IntervalTiers to a frame synchronous label matrix, for
+        example for training acoustic models. Empty intervals are seen as
+        gaps. See :func:`pympi.Intervals.frames` for the details of the
+        output.
+
+        .. note:: This function requires :mod:`numpy`.
+
+        :param list tiers: Names or numbers of the tiers in column order, if
+            ``None`` all tiers are used.
+        :param float hop: Hop size in seconds.
+        :param bool binary: Flag to only mark the presence of intervals.
+        :param float start: Start time of the first frame, if ``None`` xmin is
+            used.
+        :param float end: End time, if ``None`` xmax is used.
+        :returns: Tuple of the form: ``(matrix, vocabulary)``.
+        :raises IndexError: If a tier doesn't exist.
+        :raises Exception: If a tier is not an IntervalTier.
+        :raises ImportError: If numpy can't be loaded.
+        :raises ValueError: If the hop size is not strictly positive.
+        """
+        tiers = self.tiers if tiers is None else\
+            [self.get_tier(t) for t in tiers]
+        for tier in tiers:
+            if tier.tier_type != 'IntervalTier':
+                raise Exception('Tiertype must be IntervalTier.')
+        return Intervals.frames(
+            [[i for i in tier.get_intervals() if i[2].strip()]
+             for tier in tiers], self.xmin if start is None else start,
+            self.xmax if end is None else end, hop, binary)
+
+    def to_numpy(self, tiers=None):
+        """Give the intervals or points of tiers as columns of numpy arrays,
+        see :func:`pympi.Praat.Tier.to_numpy`.
+
+        .. note:: This function requires :mod:`numpy`.
+
+        :param list tiers: Names or numbers of the tiers, if ``None`` all
+            tiers are used.
+        :returns: List with the arrays of every tier in order.
+        :raises IndexError: If a tier doesn't exist.
+        :raises ImportError: If numpy can't be loaded.
+        """
+        tiers = self.tiers if tiers is None else\
+            [self.get_tier(t) for t in tiers]
+        return [tier.to_numpy() for tier in tiers]
+
+    def from_numpy(self, name, arrays, number=None):
+        """Add a tier filled from columns of numpy arrays, see
+        :func:`pympi.Praat.Tier.from_numpy`. The tier type follows from the
+        arrays, a ``time`` array gives a TextTier.
+
+        .. note:: This function requires :mod:`numpy`.
+
+        :param str name: Name of the tier.
+        :param dict arrays: The arrays.
+        :param int number: Place to insert the tier, when ``None`` the tier
+            will be placed on the bottom.
+        :returns: The created tier.
+        :raises ImportError: If numpy can't be loaded.
+        :raises ValueError: If the arrays differ in length or the number is
+            out of bounds.
+        """
+        tier = self.add_tier(name, 'TextTier' if 'time' in arrays else
+                             'IntervalTier', number)
+        tier.from_numpy(arrays)
+        return tier
+
+    def to_eaf(self, skipempty=True, pointlength=0.1, share_timeslots=False):
+        """Convert the object to an pympi.Elan.Eaf object. The tiers and
+        timeslots are built directly instead of adding the annotations one by
+        one and the times are converted to milliseconds in one pass.
 
         :param int pointlength: Length of respective interval from points in
                                 seconds
         :param bool skipempty: Skip the empty annotations
+        :param bool share_timeslots: Flag to let contiguous intervals share a
+            timeslot, otherwise every annotation gets its own timeslots.
         :returns: :class:`pympi.Elan.Eaf` object
         :raises ImportError: If the Eaf module can't be loaded.
-        :raises ValueError: If the pointlength is not strictly positive.
+        :raises ValueError: If the pointlength is not strictly positive or if
+            an annotation would get a negative start or a length of zero or
+            less.
         """
         from pympi.Elan import Eaf
         eaf_out = Eaf()
@@ -310,24 +724,61 @@ class TextGrid:
             raise ValueError('Pointlength should be strictly positive')
         for tier in self.get_tiers():
             eaf_out.add_tier(tier.name)
-            for ann in tier.get_intervals(True):
-                if tier.tier_type == 'TextTier':
-                    ann = (ann[0], ann[0]+pointlength, ann[1])
-                if ann[2].strip() or not skipempty:
-                    eaf_out.add_annotation(tier.name, int(round(ann[0]*1000)),
-                                           int(round(ann[1]*1000)), ann[2])
+            if tier.tier_type == 'TextTier':
+                items = [(i[0], i[0]+pointlength, i[1])
+                         for i in tier.intervals]
+            else:
+                items = tier.intervals
+            if skipempty:
+                items = [i for i in items if i[2].strip()]
+            times = [int(round(t*1000)) for i in items for t in i[:2]]
+            begins, ends = times[0::2], times[1::2]
+            if any(b >= e for b, e in zip(begins, ends)):
+                raise ValueError('Annotation length is zero or negative')
+            if begins and min(begins) < 0:
+                raise ValueError('Start is negative...')
+            aligned = eaf_out.tiers[tier.name][0]
+            timeslots = eaf_out.timeslots
+            maxts, maxaid = eaf_out.maxts, eaf_out.maxaid
+            ts2 = end = None
+            for begin, end2, item in zip(begins, ends, items):
+                if not share_timeslots or begin != end:
+                    maxts += 1
+                    ts2 = 'ts{:d}'.format(maxts)
+                    timeslots[ts2] = begin
+                ts1, end = ts2, end2
+                maxts += 1
+                ts2 = 'ts{:d}'.format(maxts)
+                timeslots[ts2] = end
+                maxaid += 1
+                aligned['a{:d}'.format(maxaid)] = (ts1, ts2, item[2], None)
+            eaf_out.annotations.update(
+                ('a{:d}'.format(i), tier.name)
+                for i in range(eaf_out.maxaid+1, maxaid+1))
+            eaf_out.maxts, eaf_out.maxaid = maxts, maxaid
+            eaf_out.invalidate_tier(tier.name)
         return eaf_out
 
 
-class Tier:
+class Tier(object):
     """Class representing a TextGrid tier, either an Interval or TextTier
 
+    .. note:: The intervals are kept sorted so that lookups, insertions and
+        overlap checks can use binary search. When you change the intervals
+        list directly make sure it stays sorted.
+
     :var str name: Name of the tier.
-    :var list intervals: List of intervals where each interval is
-                         (start, [end,] value).
+    :var list intervals: Sorted list of intervals where each interval is
+                         (start, [end,] value). The methods rely on this
+                         order, only change the list directly if it stays
+                         sorted.
     :var str tier_type: Type of the tier('IntervalTier' or 'TextTier').
     :var int xmin: Minimum x value.
     :var int xmax: Maximum x value.
+    :var tuple source: Location of the intervals in a file when they are not
+        loaded yet, this is only used internally.
+    :var grid: The :class:`pympi.Praat.TextGrid` the tier is indexed in,
+        setting the name updates its index, this is only used internally.
     """
     P_TIERS = {'IntervalTier', 'TextTier'}
 
@@ -338,6 +789,7 @@ class Tier:
         :param str tier_type: Type of the tier('IntervalTier' or 'TextTier').
         :raises TierTypeException: If the tier type is unknown.
         """
+        self.grid = None
         self.intervals = []
         self.name = name
         self.tier_type = tier_type
@@ -345,6 +797,47 @@ class Tier:
         if tier_type not in self.P_TIERS:
             raise Exception('Tiertype does not exist.')
 
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, name):
+        old, self._name = getattr(self, '_name', None), name
+        if self.grid is not None:
+            self.grid._rename_tier(self, old)
+
+    @property
+    def intervals(self):
+        if self.source is not None:
+            mode, data = self._read_source()
+            if mode == 'b':
+                intervals = _binary_items(
+                    data, 0, self.source[5], self.tier_type)[0]
+            else:
+                intervals = _text_items(*data + (self.tier_type,))
+            self.intervals = sorted(intervals)
+        return self._intervals
+
+    @intervals.setter
+    def intervals(self, intervals):
+        self._intervals = intervals
+        self.source = None
+
+    def _read_source(self):
+        """Read the part of the file that holds the intervals of a tier that
+        is not loaded yet.
+
+        :returns: Tuple of the form: ``(mode, data)`` where data is the raw
+            data for binary files and the output of :func:`tokenize` for
+            text files.
+        """
+        file_path, mode, codec, start, end, n = self.source
+        with open(file_path, 'rb') as f:
+            f.seek(start)
+            data = f.read(end-start)
+        return mode, data if mode == 'b' else tokenize(data.decode(codec))
+
     def add_point(self, point, value, check=True):
         """Add a point to the TextTier
 
@@ -355,12 +848,16 @@ class Tier:
         """
         if self.tier_type != 'TextTier':
             raise Exception('Tiertype must be TextTier.')
-        if check and any(i for i in self.intervals if i[0] == point):
-                raise Exception('No overlap is allowed')
-        self.intervals.append((point, value))
+        i = bisect.bisect_left(self.intervals, (point,))
+        if check and i < len(self.intervals) and\
+                self.intervals[i][0] == point:
+            raise Exception('No overlap is allowed')
+        self.intervals.insert(i, (point, value))
 
     def add_interval(self, begin, end, value, check=True):
-        """Add an interval to the IntervalTier.
+        """Add an interval to the IntervalTier. The overlap check only looks
+        at the neighbours of the insertion point so it runs in ``O(log n)``,
+        this is exact as long as the tier contains no overlapping intervals.
 
         :param float begin: Start time of the interval.
         :param float end: End time of the interval.
@@ -370,23 +867,31 @@ class Tier:
         """
         if self.tier_type != 'IntervalTier':
             raise Exception('Tiertype must be IntervalTier')
+        i = bisect.bisect_left(self.intervals, (begin,))
         if check:
-            if any(i for i in self.intervals if begin < i[1] and end > i[0]):
-                raise Exception('No overlap is allowed')
+            j = max(i-1, 0)
+            while j < len(self.intervals) and self.intervals[j][0] < end:
+                if begin < self.intervals[j][1]:
+                    raise Exception('No overlap is allowed')
+                j += 1
             if begin > end:
                 raise Exception('Begin must be smaller then end')
-        self.intervals.append((begin, end, value))
+        bisect.insort(self.intervals, (begin, end, value), i)
 
     def remove_interval(self, time):
-        """Remove an interval, if no interval is found nothing happens.
+        """Remove the intervals containing the time, if no interval is found
+        nothing happens. The intervals are found with binary search, this is
+        exact as long as the tier contains no overlapping intervals.
 
         :param int time: Time of the interval.
         :raises TierTypeException: If the tier is not a IntervalTier.
         """
         if self.tier_type != 'IntervalTier':
             raise Exception('Tiertype must be IntervalTier.')
-        self.intervals = [i for i in self.intervals
-                          if not(i[0] <= time and i[1] >= time)]
+        i = j = bisect.bisect_right(self.intervals, (time, float('inf')))
+        while j > 0 and self.intervals[j-1][1] >= time:
+            j -= 1
+        del(self.intervals[j:i])
 
     def remove_point(self, time):
         """Remove a point, if no point is found nothing happens.
@@ -396,35 +901,597 @@ class Tier:
         """
         if self.tier_type != 'TextTier':
             raise Exception('Tiertype must be TextTier.')
-        self.intervals = [i for i in self.intervals if i[0] != time]
+        i = j = bisect.bisect_left(self.intervals, (time,))
+        while j < len(self.intervals) and self.intervals[j][0] == time:
+            j += 1
+        del(self.intervals[i:j])
 
     def get_intervals(self, sort=False):
         """Give all the intervals or points.
 
-        :param bool sort: Flag for yielding the intervals or points sorted.
+        :param bool sort: Flag for yielding the intervals or points sorted,
+            the intervals are kept sorted so this only matters when they were
+            changed directly without keeping them sorted. Sorting an already
+            sorted list takes linear time.
         :yields: All the intervals
         """
         for i in sorted(self.intervals) if sort else self.intervals:
             yield i
 
+    def get_interval_at_time(self, time):
+        """Give the interval that contains the time with binary search over
+        the sorted intervals. Intervals are seen as half open: ``[begin,
+        end)``, so on a boundary the interval starting there is given.
+
+        :param float time: Time to look up.
+        :returns: The interval or ``None`` if there is no interval.
+        :raises Exception: If the tier is not an IntervalTier.
+        """
+        if self.tier_type != 'IntervalTier':
+            raise Exception('Tiertype must be IntervalTier.')
+        i = bisect.bisect_right(self.intervals, (time, float('inf'))) - 1
+        if i >= 0 and time < self.intervals[i][1]:
+            return self.intervals[i]
+
+    def get_intervals_at_times(self, times):
+        """Give the interval at every time, see
+        :func:`get_interval_at_time`. This is useful for looking up the
+        labels of many frames or alignment times at once.
+
+        :param list times: Times to look up.
+        :returns: List of intervals or ``None`` in the order of the times.
+        :raises Exception: If the tier is not an IntervalTier.
+        """
+        return [self.get_interval_at_time(time) for time in times]
+
+    def get_intervals_between_times(self, start, end):
+        """Give the intervals that overlap with ``[start, end]``, intervals
+        that only touch it are excluded. The first interval is found with
+        binary search, this is exact as long as the tier contains no
+        overlapping intervals.
+
+        :param float start: Start time.
+        :param float end: End time.
+        :returns: Sorted list of intervals.
+        :raises Exception: If the tier is not an IntervalTier.
+        """
+        if self.tier_type != 'IntervalTier':
+            raise Exception('Tiertype must be IntervalTier.')
+        i = max(bisect.bisect_right(self.intervals, (start, float('inf')))-1,
+                0)
+        out = []
+        while i < len(self.intervals) and self.intervals[i][0] < end:
+            if self.intervals[i][1] > start:
+                out.append(self.intervals[i])
+            i += 1
+        return out
+
+    def get_nearest_point(self, time):
+        """Give the point closest to the time with binary search over the
+        sorted points, on a tie the earlier point is given.
+
+        :param float time: Time to look up.
+        :returns: The point or ``None`` if the tier is empty.
+        :raises Exception: If the tier is not a TextTier.
+        """
+        if self.tier_type != 'TextTier':
+            raise Exception('Tiertype must be TextTier.')
+        i = bisect.bisect_left(self.intervals, (time,))
+        candidates = self.intervals[max(i-1, 0):i+1]
+        if candidates:
+            return min(candidates, key=lambda x: abs(x[0]-time))
+
+    def get_nearest_points(self, times):
+        """Give the nearest point for every time, see
+        :func:`get_nearest_point`.
+
+        :param list times: Times to look up.
+        :returns: List of points or ``None`` in the order of the times.
+        :raises Exception: If the tier is not a TextTier.
+        """
+        return [self.get_nearest_point(time) for time in times]
+
     def clear_intervals(self):
         """Removes all the intervals in the tier"""
         self.intervals = []
 
     def get_all_intervals(self):
         """Returns the true list of intervals including the empty intervals."""
-        ints = sorted(self.get_intervals(True))
-        if self.tier_type == 'IntervalTier':
-            if not ints:
-                ints.append((self.xmin, self.xmax, ''))
+        return list(self.iter_all_intervals())
+
+    def iter_all_intervals(self):
+        """Give the intervals including the empty intervals that fill the gaps
+        between xmin and xmax in a single forward pass. For a TextTier the
+        points are given.
+
+        :yields: All the intervals or points.
+        """
+        if self.tier_type != 'IntervalTier':
+            for i in self.intervals:
+                yield i
+            return
+        end = self.xmin
+        for i in self.intervals:
+            if i[0] > end:
+                yield (end, i[0], '')
+            yield i
+            end = max(end, i[1])
+        if end < self.xmax or not self.intervals:
+            yield (end, self.xmax, '')
+
+    def get_time_intervals(self):
+        """Give the sorted time intervals of the intervals that have a non
+        empty text, empty intervals are seen as gaps.
+
+        :returns: List of the form: ``[(begin, end)]``.
+        :raises Exception: If the tier is not an IntervalTier.
+        """
+        if self.tier_type != 'IntervalTier':
+            raise Exception('Tiertype must be IntervalTier.')
+        return [(i[0], i[1]) for i in self.get_intervals(True) if i[2].strip()]
+
+    def complement(self, name=None, value=''):
+        """Give a new tier containing the time between xmin and xmax that is
+        not covered by this tier.
+
+        :param str name: Name of the new tier, when ``None`` the name will be
+            generated.
+        :param str value: Text of the created intervals.
+        :returns: The created tier.
+        :raises Exception: If the tier is not an IntervalTier.
+        """
+        return self.from_time_intervals(
+            Intervals.complement(self.get_time_intervals(), self.xmin,
+                                 self.xmax),
+            '{}_complement'.format(self.name) if name is None else name, value)
+
+    def difference(self, other, name=None, value=''):
+        """Give a new tier containing the time covered by this tier but not by
+        the other tier.
+
+        :param pympi.Praat.Tier other: The other tier.
+        :param str name: Name of the new tier, when ``None`` the name will be
+            generated.
+        :param str value: Text of the created intervals.
+        :returns: The created tier.
+        :raises Exception: If one of the tiers is not an IntervalTier.
+        """
+        return self.from_time_intervals(
+            Intervals.difference(self.get_time_intervals(),
+                                 other.get_time_intervals()),
+            '{}_{}_difference'.format(self.name, other.name)
+            if name is None else name, value)
+
+    def intersection(self, other, name=None, value=''):
+        """Give a new tier containing the time covered by both tiers.
+
+        :param pympi.Praat.Tier other: The other tier.
+        :param str name: Name of the new tier, when ``None`` the name will be
+            generated.
+        :param str value: Text of the created intervals.
+        :returns: The created tier.
+        :raises Exception: If one of the tiers is not an IntervalTier.
+        """
+        return self.from_time_intervals(
+            Intervals.intersection(self.get_time_intervals(),
+                                   other.get_time_intervals()),
+            '{}_{}_intersection'.format(self.name, other.name)
+            if name is None else name, value)
+
+    def union(self, other, name=None, value=''):
+        """Give a new tier containing the time covered by either of the tiers.
+
+        :param pympi.Praat.Tier other: The other tier.
+        :param str name: Name of the new tier, when ``None`` the name will be
+            generated.
+        :param str value: Text of the created intervals.
+        :returns: The created tier.
+        :raises Exception: If one of the tiers is not an IntervalTier.
+        """
+        return self.from_time_intervals(
+            Intervals.union(self.get_time_intervals(),
+                            other.get_time_intervals()),
+            '{}_{}_union'.format(self.name, other.name)
+            if name is None else name, value)
+
+    def from_time_intervals(self, intervals, name, value=''):
+        """Give a new IntervalTier with the same domain as this tier filled
+        with sorted time intervals without any overlap checking.
+
+        :param list intervals: Sorted intervals of the form:
+            ``[(begin, end)]``.
+        :param str name: Name of the new tier.
+        :param str value: Text of the created intervals.
+        :returns: The created tier.
+        """
+        tier = Tier(self.xmin, self.xmax, name, 'IntervalTier')
+        tier.intervals = [(b, e, value) for b, e in intervals]
+        return tier
+
+    def to_numpy(self):
+        """Give the intervals or points as columns of numpy arrays. When the
+        tier is not loaded yet the columns are filled straight from the text
+        in the file without creating the intervals.
+
+        .. note:: This function requires :mod:`numpy`.
+
+        :returns: Dictionary of the form: ``{'xmin', 'xmax', 'labels',
+            'vocabulary'}`` for IntervalTiers and ``{'time', 'labels',
+            'vocabulary'}`` for TextTiers. The times are float64 arrays in the
+            sorted order of the intervals, the labels are int32 codes that
+            index the sorted vocabulary list.
+        :raises ImportError: If numpy can't be loaded.
+        """
+        import numpy
+        keys = ['xmin', 'xmax'] if self.tier_type == 'IntervalTier' else\
+            ['time']
+        if self.source is not None and self.source[1] != 'b':
+            tokens, strings = self._read_source()[1]
+            times = [tokens[i::len(keys)+1] for i in range(len(keys))]
+        else:
+            columns = list(zip(*self.intervals)) or [[]]*(len(keys)+1)
+            times, strings = columns[:-1], columns[-1]
+        arrays = {k: numpy.array(t, dtype=numpy.float64)
+                  for k, t in zip(keys, times)}
+        vocabulary, labels = numpy.unique(numpy.array(strings, dtype='U'),
+                                          return_inverse=True)
+        arrays['labels'] = labels.astype(numpy.int32).reshape(-1)
+        arrays['vocabulary'] = vocabulary.tolist()
+        if self.source is not None:
+            order = numpy.lexsort(
+                [arrays['labels']] + [arrays[k] for k in reversed(keys)])
+            for k in keys + ['labels']:
+                arrays[k] = arrays[k][order]
+        return arrays
+
+    def from_numpy(self, arrays):
+        """Replace the intervals or points by columns of numpy arrays as
+        given by :func:`to_numpy`, there is no overlap checking.
+
+        .. note:: This function requires :mod:`numpy`.
+
+        :param dict arrays: Dictionary of the form: ``{'xmin', 'xmax',
+            'labels', 'vocabulary'}`` for IntervalTiers and ``{'time',
+            'labels', 'vocabulary'}`` for TextTiers.
+        :raises ImportError: If numpy can't be loaded.
+        :raises KeyError: If an array for the tier type is missing.
+        :raises ValueError: If the arrays differ in length.
+        """
+        import numpy
+        keys = ['xmin', 'xmax'] if self.tier_type == 'IntervalTier' else\
+            ['time']
+        columns = [numpy.asarray(arrays[k], dtype=numpy.float64).tolist()
+                   for k in keys]
+        vocabulary = arrays['vocabulary']
+        columns.append([vocabulary[c] for c in
+                        numpy.asarray(arrays['labels']).tolist()])
+        if any(len(c) != len(columns[0]) for c in columns):
+            raise ValueError('Arrays must have the same length')
+        self.intervals = sorted(zip(*columns))
+
+
+def iter_textgrid(file_path, codec='utf-8', tiers=None, chunk_size=1 << 20):
+    """Read the intervals and points of a TextGrid in file order without
+    building the tiers, the memory use is bounded by the chunk size. Normal,
+    short, chronological and binary TextGrids are supported, for the
+    chronological format the records are in time order.
+
+    :param str file_path: Path of the file.
+    :param str codec: Text encoding for the input. Note that this will be
+        ignored for binary TextGrids.
+    :param list tiers: Names of the tiers to give, if ``None`` all tiers are
+        given. The other tiers are skipped without decoding their contents.
+    :param int chunk_size: Number of bytes to read at once from a text file.
+    :yields: Tuples of the form: ``(tier_name, tier_type, xmin, xmax,
+        text)``, for points xmin and xmax are both the time of the point.
+    """
+    with open(file_path, 'rb') as f:
+        header = f.read(12)
+        if header == b'ooBinaryFile':
+            records = _iter_binary(f, tiers)
+        else:
+            records = _iter_text(f, header, codec, tiers, chunk_size)
+        for record in records:
+            yield record
+
+
+def _iter_binary(f, tiers):
+    """Read the records of a binary TextGrid, see :func:`iter_textgrid`.
+
+    :param file f: Stream positioned after the ``ooBinaryFile`` header.
+    :param list tiers: Names of the tiers to give or ``None``.
+    :yields: Records of the form: ``(tier_name, tier_type, xmin, xmax,
+        text)``.
+    """
+    def string(skip=False):
+        length = SHORT.unpack(f.read(2))[0]
+        encoding = 'ascii'
+        # Multi byte strings have an initial length of -1
+        if length == -1:
+            length = 2*SHORT.unpack(f.read(2))[0]
+            encoding = 'utf-16-be'
+        if skip:
+            f.seek(length, 1)
+        else:
+            return f.read(length).decode(encoding)
+
+    f.read(bytearray(f.read(1))[0])  # skip oo type
+    f.read(17)  # skip xmin, xmax and <exists>
+    for i in range(INT.unpack(f.read(4))[0]):
+        tier_type = f.read(bytearray(f.read(1))[0]).decode('ascii')
+        name = string()
+        f.read(16)  # skip xmin and xmax
+        skip = tiers is not None and name not in tiers
+        interval = tier_type == 'IntervalTier'
+        for j in range(INT.unpack(f.read(4))[0]):
+            if skip:
+                f.seek(16 if interval else 8, 1)
+                string(True)
+            elif interval:
+                x1, x2 = DOUBLES.unpack(f.read(16))
+                yield (name, tier_type, x1, x2, string())
             else:
-                if ints[0][0] > self.xmin:
-                    ints.insert(0, (self.xmin, ints[0][0], ''))
-                if ints[-1][1] < self.xmax:
-                    ints.append((ints[-1][1], self.xmax, ''))
-                p = ints[-1]
-                for index, i in reversed(list(enumerate(ints[:-1], 1))):
-                    if p[0] - i[1] != 0:
-                        ints.insert(index, (i[1], p[0], ''))
-                    p = i
-        return ints
+                x1 = DOUBLE.unpack(f.read(8))[0]
+                yield (name, tier_type, x1, x1, string())
+
+
+def _iter_text(f, header, codec, tiers, chunk_size):
+    """Read the records of a text TextGrid, see :func:`iter_textgrid`.
+
+    :param file f: Stream positioned after the header.
+    :param bytes header: Bytes already read from the stream.
+    :param str codec: Text encoding, a byte order mark overrides it.
+    :param list tiers: Names of the tiers to give or ``None``.
+    :param int chunk_size: Number of bytes to read at once.
+    :yields: Records of the form: ``(tier_name, tier_type, xmin, xmax,
+        text)``.
+    """
+    if header[:2] in (codecs.BOM_UTF16_BE, codecs.BOM_UTF16_LE):
+        codec = 'utf-16'
+    decode = codecs.getincrementaldecoder(codec)().decode
+
+    def read_tokens():
+        rest, data = u'', header
+        while True:
+            text = rest + decode(data, not data)
+            # Only split on a newline outside of a string, a string always
+            # holds an odd number of quotes before a newline inside it.
+            cut = text.rfind('\n') if data else len(text)
+            while cut > 0 and data and text.count('"', 0, cut) % 2:
+                cut = text.rfind('\n', 0, cut)
+            cut = max(cut, 0)
+            tokens, strings = tokenize(text[:cut])
+            rest = text[cut:]
+            strings = iter(strings)
+            for token in tokens:
+                yield next(strings) if token == '"' else token
+            if not data:
+                break
+            data = f.read(chunk_size)
+
+    tokens = read_tokens()
+    if next(tokens) == CHRONOLOGICAL:
+        next(tokens), next(tokens)  # skip xmin and xmax
+        header = []
+        for i in range(int(next(tokens))):
+            header.append((next(tokens), next(tokens)))
+            next(tokens), next(tokens)  # skip xmin and xmax
+        for number in tokens:
+            tier_type, name = header[int(number)-1]
+            x1 = next(tokens)
+            x2 = next(tokens) if tier_type == 'IntervalTier' else x1
+            text = next(tokens)
+            if tiers is None or name in tiers:
+                yield (name, tier_type, float(x1), float(x2), text)
+        return
+    for i in range(3):
+        next(tokens)  # skip object class, xmin and xmax
+    if next(tokens) != '<exists>':
+        return
+    for i in range(int(next(tokens))):
+        tier_type, name = next(tokens), next(tokens)
+        next(tokens), next(tokens)  # skip xmin and xmax
+        skip = tiers is not None and name not in tiers
+        interval = tier_type == 'IntervalTier'
+        for j in range(int(next(tokens))):
+            x1 = next(tokens)
+            x2 = next(tokens) if interval else x1
+            text = next(tokens)
+            if not skip:
+                yield (name, tier_type, float(x1), float(x2), text)
+
+
+class TextGridWriter:
+    """Write a TextGrid incrementally in constant memory, for example from a
+    streaming recognizer. Tiers are written one after another and the
+    intervals of a tier have to be added in time order, gaps are filled with
+    empty intervals like :func:`TextGrid.to_file` does. Since the sizes are
+    only known at the end, placeholders are written and patched when the
+    writer is closed. The writer can be used as a context manager::
+
+        with TextGridWriter('out.TextGrid', 0, 10) as writer:
+            writer.add_tier('words')
+            writer.add_interval(0.5, 1.2, 'hello')
+
+    :var str file_path: Path of the file.
+    :var float xmin: Minimum x value.
+    :var float xmax: Maximum x value.
+    :var str mode: Write mode, see :func:`TextGrid.to_file`.
+    :var int tier_num: Number of tiers written.
+    """
+    SIZE_WIDTH = 10
+
+    def __init__(self, file_path, xmin, xmax, codec='utf-8', mode='normal'):
+        """Open the file and write the header.
+
+        :param str file_path: Path of the file.
+        :param float xmin: Minimum x value.
+        :param float xmax: Maximum x value.
+        :param str codec: Text encoding, ignored for binary TextGrids.
+        :param str mode: Write mode, possible modes: 'n'/'normal',
+            's'/'short' and 'b'/'binary'.
+        :raises Exception: If the mode is unknown.
+        """
+        if mode not in ['normal', 'n', 'short', 's', 'binary', 'b']:
+            raise Exception('Unknown mode')
+        self.file_path = file_path
+        self.xmin, self.xmax = xmin, xmax
+        self.mode = mode[0]
+        self.tier_num = 0
+        self.formats = TEXT_SHORT if self.mode == 's' else TEXT_NORMAL
+        self.encode = codecs.getincrementalencoder(codec)().encode
+        self.out = []
+        self.sizes = []
+        self.tier = None
+        self.f = open(file_path, 'wb')
+        if self.mode == 'b':
+            self.write(b'ooBinaryFile\x08TextGrid' +
+                       DOUBLES.pack(xmin, xmax) + b'\x01')
+            self.placeholder()
+        else:
+            self.write_sized(self.formats['header'], xmin, xmax)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self, data):
+        """Buffer output, this function is only used internally.
+
+        :param data: Bytes for binary output and text otherwise.
+        """
+        self.out.append(data)
+        if len(self.out) >= CHUNK:
+            self.flush()
+
+    def write_sized(self, template, *args):
+        """Format and write a template whose last field is a size, a size
+        placeholder is written for that field. This function is only used
+        internally.
+
+        :param str template: Template of one of the text formats.
+        :param args: Values for the other fields of the template.
+        """
+        i = template.rindex('{')
+        self.write(template[:i].format(*args))
+        self.placeholder()
+        self.write(template[template.index('}', i)+1:])
+
+    def placeholder(self):
+        """Write a placeholder for a size and remember its offset, this
+        function is only used internally.
+        """
+        self.flush()
+        self.sizes.append([self.f.tell(), 0])
+        self.out.append(INT.pack(0) if self.mode == 'b' else
+                        u'0'.ljust(self.SIZE_WIDTH))
+
+    def flush(self):
+        """Write the buffered output to the file."""
+        if self.mode == 'b':
+            self.f.write(b''.join(self.out))
+        else:
+            self.f.write(self.encode(u''.join(self.out)))
+        del(self.out[:])
+
+    def add_tier(self, name, tier_type='IntervalTier', xmin=None, xmax=None):
+        """Start a new tier, this finishes the current tier.
+
+        :param str name: Name of the tier.
+        :param str tier_type: Type of the tier.
+        :param float xmin: Minimum x value, if ``None`` the xmin of the
+            TextGrid is used.
+        :param float xmax: Maximum x value, if ``None`` the xmax of the
+            TextGrid is used.
+        :raises Exception: If the tier type is unknown.
+        """
+        if tier_type not in Tier.P_TIERS:
+            raise Exception('Tiertype does not exist.')
+        self.end_tier()
+        xmin = self.xmin if xmin is None else xmin
+        xmax = self.xmax if xmax is None else xmax
+        self.tier_num += 1
+        if self.mode == 'b':
+            self.write(bytes(bytearray([len(tier_type)])) +
+                       tier_type.encode('ascii') + binary_string(name) +
+                       DOUBLES.pack(xmin, xmax))
+            self.placeholder()
+        else:
+            self.write_sized(
+                self.formats['tier'], self.tier_num, tier_type,
+                name.replace('"', '""'), xmin, xmax,
+                'intervals' if tier_type == 'IntervalTier' else 'points')
+        # Type, end of the last interval, xmax and number of intervals
+        self.tier = [tier_type, xmin, xmax, 0]
+
+    def add_interval(self, begin, end, value):
+        """Add an interval to the current IntervalTier, the gap since the
+        previous interval is filled with an empty interval.
+
+        :param float begin: Start time of the interval.
+        :param float end: End time of the interval.
+        :param str value: Text of the interval.
+        :raises Exception: If overlap, begin > end or wrong tiertype.
+        """
+        if self.tier is None or self.tier[0] != 'IntervalTier':
+            raise Exception('Tiertype must be IntervalTier')
+        if begin < self.tier[1]:
+            raise Exception('No overlap is allowed')
+        if begin > end:
+            raise Exception('Begin must be smaller then end')
+        if begin > self.tier[1]:
+            self.write_item(self.tier[1], begin, '')
+        self.write_item(begin, end, value)
+        self.tier[1] = end
+
+    def add_point(self, point, value):
+        """Add a point to the current TextTier.
+
+        :param float point: Time of the point.
+        :param str value: Text of the point.
+        :raises Exception: If the points are out of order or wrong tiertype.
+        """
+        if self.tier is None or self.tier[0] != 'TextTier':
+            raise Exception('Tiertype must be TextTier.')
+        if self.tier[3] and point <= self.tier[1]:
+            raise Exception('Points must be added in time order')
+        self.write_item(point, value)
+        self.tier[1] = point
+
+    def write_item(self, *item):
+        """Write an interval or point, this function is only used internally.
+
+        :param item: Interval or point.
+        """
+        self.tier[3] += 1
+        if self.mode == 'b':
+            self.write(b''.join(DOUBLE.pack(x) for x in item[:-1]) +
+                       binary_string(item[-1]))
+        else:
+            self.write(self.formats[self.tier[0]].format(
+                self.tier[3], *item[:-1] + (item[-1].replace('"', '""'),)))
+
+    def end_tier(self):
+        """Finish the current tier, this is only used internally."""
+        if self.tier is None:
+            return
+        if self.tier[0] == 'IntervalTier' and\
+                (self.tier[1] < self.tier[2] or not self.tier[3]):
+            self.write_item(self.tier[1], self.tier[2], '')
+        self.sizes[-1][1] = self.tier[3]
+        self.tier = None
+
+    def close(self):
+        """Finish the current tier, patch the sizes and close the file."""
+        if self.f.closed:
+            return
+        self.end_tier()
+        self.flush()
+        self.sizes[0][1] = self.tier_num
+        for offset, size in self.sizes:
+            self.f.seek(offset)
+            self.f.write(INT.pack(size) if self.mode == 'b' else
+                         self.encode(str(size).ljust(self.SIZE_WIDTH)))
+        self.f.close()
@@ -2,4 +2,5 @@
 from pympi.Praat import TextGrid
 from pympi.Elan import Eaf
 
-__all__ = ['Praat', 'Elan', 'eaf_from_chat']
+__all__ = ['Praat', 'Elan', 'Corpus', 'Agreement', 'Intervals',
+           'eaf_from_chat']
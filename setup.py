@@ -37,6 +37,7 @@ Optional requirements
 ---------------------
 
 -  `lxml`_ is used for testing.
+-  `numpy`_ is used for the frame and array conversions.
 
 Documentation and downloads
 ---------------------------
@@ -102,6 +103,7 @@ Under supervision of: Francisco Toreirra (francisco.torreira at mpi.nl)
 .. _TextGrid: http://www.fon.hum.uva.nl/praat/
 .. _Heldner and Edlund’s method: http://www.sciencedirect.com/science/article/pii/S0095447010000628
 .. _lxml: http://lxml.de/
+.. _numpy: http://www.numpy.org/
 .. _here: http://dopefishh.github.io/pympi/
 .. _pypi: http://dopefishh.github.io/pympi/""",
       author_email='mart@martlubbers.net',
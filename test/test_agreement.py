@@ -0,0 +1,123 @@
+#!/bin/env python
+# -*- coding: utf-8 -*-
+
+from pympi import Agreement, Eaf
+from pympi.Praat import TextGrid
+import os
+import shutil
+import tempfile
+import unittest
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class AgreementTest(unittest.TestCase):
+    def setUp(self):
+        self.eaf = Eaf()
+        self.eaf.add_tier('c1')
+        self.eaf.add_tier('c2')
+        self.eaf.add_tier('c3')
+        self.eaf.add_tier('o1')
+        self.eaf.add_tier('o2')
+        self.eaf.add_annotations('c1', [(0, 100, 'a'), (200, 300, 'b')])
+        self.eaf.add_annotations('c2', [(0, 100, 'a'), (200, 400, 'b')])
+        self.eaf.add_annotations('c3', [(0, 50, 'a'), (200, 300, 'a')])
+
+    def test_get_intervals(self):
+        tg = TextGrid(xmax=1)
+        tier = tg.add_tier('t')
+        tier.add_interval(0.1, 0.2, 'a')
+        tier.add_interval(0.2, 0.3, '')
+        self.assertEqual(Agreement.get_intervals(tier), [(100, 200, 'a')])
+        self.assertEqual(Agreement.get_intervals((self.eaf, 'c1')),
+                         [(0, 100, 'a'), (200, 300, 'b')])
+        self.assertRaises(KeyError, Agreement.get_intervals, (self.eaf, 'x'))
+        self.assertRaises(Exception, Agreement.get_intervals,
+                          tg.add_tier('p', 'TextTier'))
+
+    def test_sweep(self):
+        self.assertEqual(
+            list(Agreement.sweep([(self.eaf, 'c1'), (self.eaf, 'c3')])),
+            [(0, 50, ('a', 'a')), (50, 100, ('a', None)),
+             (100, 200, (None, None)), (200, 300, ('b', 'a'))])
+
+    def test_get_segments(self):
+        self.assertEqual(
+            Agreement.get_segments([(0, 300, 'a'), (100, 200, 'b'),
+                                    (250, 400, 'c')], -50, 450),
+            [(-50, 0, None), (0, 100, 'a'), (100, 200, 'b'), (200, 250, 'a'),
+             (250, 400, 'c'), (400, 450, None)])
+        # With equal begins the longer interval is ordered last
+        self.assertEqual(
+            Agreement.get_segments([(0, 100, 'a'), (0, 50, 'b')], 25, 75),
+            [(25, 75, 'a')])
+
+    def test_contingency(self):
+        self.assertEqual(
+            Agreement.contingency((self.eaf, 'c1'), (self.eaf, 'c2')),
+            {('a', 'a'): 100, (None, None): 100, ('b', 'b'): 100,
+             (None, 'b'): 100})
+        # The most recently started of overlapping annotations is used
+        self.eaf.add_annotations('o1', [(0, 100, 'x'), (50, 150, 'y')])
+        self.eaf.add_annotations('o2', [(0, 150, 'x')])
+        self.assertEqual(
+            Agreement.contingency((self.eaf, 'o1'), (self.eaf, 'o2')),
+            {('x', 'x'): 50, ('y', 'x'): 100})
+
+    @unittest.skipIf(numpy is None, 'numpy is not available')
+    def test_contingency_hop(self):
+        self.assertEqual(
+            Agreement.contingency((self.eaf, 'c1'), (self.eaf, 'c2'),
+                                  hop=50),
+            {('a', 'a'): 2, (None, None): 2, ('b', 'b'): 2, (None, 'b'): 2})
+        self.eaf.add_annotations('o1', [(0, 100, 'x'), (50, 150, 'y')])
+        self.eaf.add_annotations('o2', [(0, 150, 'x')])
+        self.assertEqual(
+            Agreement.contingency((self.eaf, 'o1'), (self.eaf, 'o2'), hop=10),
+            {('x', 'x'): 5, ('y', 'x'): 10})
+
+    def test_cohen_kappa(self):
+        self.assertEqual(
+            Agreement.cohen_kappa((self.eaf, 'c1'), (self.eaf, 'c1')), 1.0)
+        self.assertAlmostEqual(
+            Agreement.cohen_kappa((self.eaf, 'c1'), (self.eaf, 'c2')),
+            (0.75-0.3125)/(1-0.3125))
+        self.assertEqual(Agreement.kappa({}), 0.0)
+
+    def test_fleiss_kappa(self):
+        tiers = [(self.eaf, 'c1'), (self.eaf, 'c2')]
+        self.assertAlmostEqual(Agreement.fleiss_kappa(tiers),
+                               (0.75-0.34375)/(1-0.34375))
+        self.assertEqual(Agreement.fleiss_kappa(tiers[:1]*3), 1.0)
+        self.assertRaises(ValueError, Agreement.fleiss_kappa, tiers[:1])
+
+    def test_event_agreement(self):
+        self.eaf.add_tier('c4')
+        self.eaf.add_annotations('c4', [(5, 95, 'a'), (190, 310, 'a'),
+                                        (500, 600, 'c')])
+        self.assertEqual(
+            Agreement.event_agreement((self.eaf, 'c1'), (self.eaf, 'c4'), 10),
+            {'matches': 2, 'precision': 2/3.0, 'recall': 1.0, 'f1': 0.8})
+        self.assertEqual(Agreement.event_agreement(
+            (self.eaf, 'c1'), (self.eaf, 'c4'), 10, True)['matches'], 1)
+        self.assertEqual(Agreement.event_agreement(
+            (self.eaf, 'c1'), (self.eaf, 'c4'))['matches'], 0)
+
+    def test_batch_kappa(self):
+        tempdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tempdir, 'f.eaf')
+            self.eaf.to_file(path)
+            pooled, kappas, errors = Agreement.batch_kappa(
+                [path], 'c1', 'c2', processes=2)
+            self.assertAlmostEqual(pooled, (0.75-0.3125)/(1-0.3125))
+            self.assertEqual(list(kappas), [path])
+            self.assertEqual(errors, [])
+        finally:
+            shutil.rmtree(tempdir)
+
+
+if __name__ == '__main__':
+    unittest.main()
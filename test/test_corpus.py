@@ -0,0 +1,167 @@
+#!/bin/env python
+# -*- coding: utf-8 -*-
+
+from pympi import Eaf
+from pympi.Corpus import Frequencies, Index, map_reduce, merge, tokenize
+import operator
+import os
+import shutil
+import tempfile
+import unittest
+
+
+def count_annotations(eaf):
+    return len(eaf.get_annotation_data_for_tier('spkA'))
+
+
+def get_tier_names(eaf):
+    return sorted(eaf.get_tier_names())
+
+
+get_tier_names.tiers = ['spkA']
+
+
+class Corpus(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.paths = []
+        for i, values in enumerate([['The quick brown fox.', 'Jumps!'],
+                                    ['the lazy dog', 'quick, quicker']]):
+            eaf = Eaf()
+            eaf.add_tier('spkA')
+            for j, value in enumerate(values):
+                eaf.add_annotation('spkA', j*1000, j*1000+500, value)
+            path = os.path.join(self.tempdir, 'f{}.eaf'.format(i))
+            eaf.to_file(path)
+            self.paths.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize(u'The quick, brown fox!'),
+                         ['the', 'quick', 'brown', 'fox'])
+        self.assertEqual(tokenize(''), [])
+        self.assertEqual(tokenize(u'Is it?', False, r'\S+'), ['Is', 'it?'])
+
+    def test_map_reduce(self):
+        broken = os.path.join(self.tempdir, 'broken.eaf')
+        with open(broken, 'w') as f:
+            f.write('<ANNOTATION_DOCUMENT>')
+        paths = self.paths + [broken]
+        progress = []
+        for processes in [1, 2]:
+            total, errors, stats = map_reduce(
+                paths, count_annotations, operator.add, 0, processes, 1,
+                progress=progress.append)
+            self.assertEqual(total, 4)
+            self.assertEqual([e[0] for e in errors], [broken])
+            self.assertEqual(stats['files'], 3)
+            self.assertEqual(stats['errors'], 1)
+            self.assertEqual(stats['annotations'], 4)
+        self.assertEqual(len(progress), 6)
+        self.assertEqual(progress[-1]['total'], 3)
+
+        names, errors, _ = map_reduce(self.paths, get_tier_names,
+                                      operator.add, processes=1)
+        self.assertEqual(names, ['spkA', 'spkA'])
+        names, errors, _ = map_reduce(self.paths, len, operator.add,
+                                      processes=1, loader=None)
+        self.assertEqual(names, sum(len(p) for p in self.paths))
+
+    def test_merge(self):
+        self.assertEqual(merge([1], [2, 3]), [1, 2, 3])
+        self.assertEqual(merge({'a': 1}, {'b': 2}), {'a': 1, 'b': 2})
+        freqs, other = Frequencies(), Frequencies()
+        freqs.add_file(self.paths[0])
+        other.add_file(self.paths[1])
+        self.assertIs(merge(freqs, other), freqs)
+        self.assertEqual(freqs.get_frequencies()['quick'], 2)
+
+    def test_frequencies(self):
+        freqs = Frequencies(n=2)
+        freqs.add_file(self.paths[0])
+        freqs.add_file(self.paths[1])
+        self.assertEqual(freqs.get_frequencies()['quick'], 2)
+        self.assertEqual(freqs.get_frequencies(2)[('quick', 'brown')], 1)
+        self.assertEqual(freqs.get_frequencies(2)[('fox', 'jumps')], 0)
+        self.assertEqual(freqs.get_frequencies(speaker='spkA')['the'], 2)
+        self.assertEqual(
+            freqs.get_frequencies(file_path=self.paths[1]),
+            {'the': 1, 'lazy': 1, 'dog': 1, 'quick': 1, 'quicker': 1})
+        self.assertRaises(KeyError, freqs.get_frequencies, speaker='spkB')
+        self.assertRaises(ValueError, Frequencies, n=0)
+
+        parallel = Frequencies(n=2)
+        self.assertEqual(parallel.add_corpus(self.paths, 2), [])
+        self.assertEqual(parallel.counts, freqs.counts)
+        self.assertEqual(parallel.files, freqs.files)
+
+        # Adding to existing counts only sends the settings to the workers
+        resumed = Frequencies(n=2)
+        resumed.add_file(self.paths[0])
+        resumed.add_corpus(self.paths[1:], 2)
+        self.assertEqual(resumed.counts, freqs.counts)
+        self.assertEqual(resumed.speakers, freqs.speakers)
+
+        path = os.path.join(self.tempdir, 'freqs.pkl')
+        freqs.to_file(path)
+        loaded = Frequencies(path)
+        self.assertEqual(loaded.n, 2)
+        self.assertEqual(loaded.speakers, freqs.speakers)
+
+    def test_index_search(self):
+        index = Index()
+        self.assertEqual(index.update(self.paths), self.paths)
+        f0, f1 = self.paths
+        self.assertEqual(index.search('Quick'), [(f0, 'spkA', 0, 500),
+                                                 (f1, 'spkA', 1000, 1500)])
+        self.assertEqual(index.search('cat'), [])
+        self.assertEqual(index.search_phrase('brown fox'),
+                         [(f0, 'spkA', 0, 500)])
+        self.assertEqual(index.search_phrase('fox brown'), [])
+        self.assertEqual(index.search_prefix('qu'), [(f0, 'spkA', 0, 500),
+                                                     (f1, 'spkA', 1000, 1500)])
+        self.assertEqual(index.search_prefix('x'), [])
+
+    def test_index_kwic(self):
+        index = Index()
+        index.update(self.paths)
+        f0, f1 = self.paths
+        self.assertEqual(index.kwic('quick', 1), [
+            (f0, 'spkA', 0, 500, 'the', 'quick', 'brown'),
+            (f1, 'spkA', 1000, 1500, '', 'quick', 'quicker')])
+
+    def test_index_update(self):
+        index = Index(tiers=['spkA', 'spkB'])
+        index.update(self.paths)
+        self.assertEqual(index.update(self.paths), [])
+        self.assertEqual(index.search('fox'),
+                         [(self.paths[0], 'spkA', 0, 500)])
+
+        eaf = Eaf()
+        eaf.add_tier('spkA')
+        eaf.add_annotation('spkA', 0, 100, 'a cat')
+        eaf.to_file(self.paths[1])
+        mtime = os.path.getmtime(self.paths[1]) + 10
+        os.utime(self.paths[1], (mtime, mtime))
+        self.assertEqual(index.update(self.paths), [self.paths[1]])
+        self.assertEqual(index.search('dog'), [])
+        self.assertEqual(index.search('cat'),
+                         [(self.paths[1], 'spkA', 0, 100)])
+
+        index.update(self.paths[:1])
+        self.assertEqual(index.search('cat'), [])
+        self.assertEqual(sorted(index.files), self.paths[:1])
+
+    def test_index_to_file(self):
+        index = Index()
+        index.update(self.paths)
+        path = os.path.join(self.tempdir, 'index.pkl')
+        index.to_file(path)
+        index2 = Index(path)
+        self.assertEqual(index2.search('fox'), index.search('fox'))
+        self.assertEqual(index2.update(self.paths), [])
+
+if __name__ == '__main__':
+    unittest.main()
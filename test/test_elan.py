@@ -3,8 +3,15 @@
 
 #from lxml import etree
 from pympi import Eaf
+from pympi.Elan import batch_eaf_from_chat, eaf_from_chat
+import os
+import shutil
 import tempfile
 import unittest
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class Elan(unittest.TestCase):
@@ -33,6 +40,24 @@ class Elan(unittest.TestCase):
         self.assertRaises(ValueError,
                           self.eaf.add_annotation, 'tier2', 0, 1)
 
+    def test_add_annotations(self):
+        self.eaf.add_tier('tier1')
+        self.eaf.add_annotations('tier1', [(0, 1, 'a'), (1, 2, 'b')])
+        self.assertEqual(
+            sorted(self.eaf.get_annotation_data_for_tier('tier1')),
+            [(0, 1, 'a'), (1, 2, 'b')])
+        self.assertRaises(KeyError, self.eaf.add_annotations, 't1', [])
+        self.assertRaises(ValueError, self.eaf.add_annotations, 'tier1',
+                          [(5, 6, 'c'), (2, 1, 'd')])
+        self.assertRaises(ValueError, self.eaf.add_annotations, 'tier1',
+                          [(-1, 1, 'c')])
+        self.assertEqual(len(self.eaf.get_annotation_data_for_tier('tier1')),
+                         2)
+        self.eaf.add_tier('tier2')
+        self.eaf.add_ref_annotation('tier2', 'tier1', 0, 'r1')
+        self.assertRaises(ValueError, self.eaf.add_annotations, 'tier2',
+                          [(0, 1, 'a')])
+
     def test_add_controlled_vocabulary(self):
         self.eaf.add_controlled_vocabulary('cv1')
         self.eaf.add_controlled_vocabulary('cv2')
@@ -259,6 +284,26 @@ class Elan(unittest.TestCase):
         self.eaf.clean_time_slots()
         self.assertEqual(len(ts)-2, len(self.eaf.timeslots))
 
+    def test_complement_tier(self):
+        self.eaf.add_tier('tier1')
+        self.eaf.add_tier('tier2')
+        self.eaf.add_annotation('tier1', 0, 100)
+        self.eaf.add_annotation('tier2', 200, 300)
+        self.eaf.add_annotation('tier2', 500, 1000)
+        self.assertEqual(self.eaf.complement_tier('tier2', value='x'),
+                         'tier2_complement')
+        self.assertEqual(
+            sorted(self.eaf.get_annotation_data_for_tier('tier2_complement')),
+            [(0, 200, 'x'), (300, 500, 'x')])
+        self.assertRaises(KeyError, self.eaf.complement_tier, 'tier3')
+
+        # Timeslots without a time are ignored
+        self.eaf.timeslots[self.eaf.generate_ts_id()] = None
+        self.eaf.complement_tier('tier1', 'tier1_complement')
+        self.assertEqual(
+            sorted(self.eaf.get_annotation_data_for_tier('tier1_complement')),
+            [(100, 1000, '')])
+
     def test_copy_tier(self):
         self.eaf.add_tier('test1')
         self.eaf.add_annotation('test1', 0, 100, 'a')
@@ -312,6 +357,20 @@ class Elan(unittest.TestCase):
                    [(4000, 4000, 'O12_t1_t2')]),
             list(self.eaf.get_gaps_and_overlaps('t1', 't2', 3000)))
 
+    def test_difference_tiers(self):
+        self.eaf.add_tier('tier1')
+        self.eaf.add_tier('tier2')
+        self.eaf.add_annotation('tier1', 0, 1000)
+        self.eaf.add_annotation('tier1', 1500, 2000)
+        self.eaf.add_annotation('tier2', 200, 300)
+        self.eaf.add_annotation('tier2', 250, 400)
+        self.eaf.add_annotation('tier2', 900, 1600)
+        self.assertEqual(self.eaf.difference_tiers('tier1', 'tier2', 'd'),
+                         'd')
+        self.assertEqual(sorted(self.eaf.get_annotation_data_for_tier('d')),
+                         [(0, 200, ''), (400, 900, ''), (1600, 2000, '')])
+        self.assertRaises(KeyError, self.eaf.difference_tiers, 'tier1', 'a')
+
     def test_extract(self):
         self.eaf.add_tier('tier1')
         self.eaf.add_annotation('tier1', 0, 1000, 'a1')
@@ -486,6 +545,21 @@ class Elan(unittest.TestCase):
         self.assertEqual(sorted(self.eaf.child_tiers_for('parent2')), [])
         self.assertRaises(KeyError, self.eaf.child_tiers_for, 'parent3')
 
+    def test_get_aligned_time_interval(self):
+        self.assertEqual(self.eaf.get_aligned_time_interval(), (0, 0))
+        self.eaf.add_tier('tier1')
+        self.eaf.add_annotation('tier1', 100, 500, 'a')
+        self.eaf.add_annotation('tier1', 500, 1000, 'b')
+        self.assertEqual(self.eaf.get_aligned_time_interval(), (100, 1000))
+        aid = self.eaf.generate_annotation_id()
+        self.eaf.tiers['tier1'][0][aid] = (
+            self.eaf.generate_ts_id(50), self.eaf.generate_ts_id(), 'c', None)
+        self.eaf.annotations[aid] = 'tier1'
+        self.eaf.invalidate_tier('tier1')
+        self.assertEqual(self.eaf.get_aligned_time_interval(), (100, 1000))
+        self.eaf.add_annotation('tier1', 1000, 1200, 'd')
+        self.assertEqual(self.eaf.get_aligned_time_interval(), (100, 1200))
+
     def test_get_full_time_interval(self):
         self.assertEqual(self.eaf.get_full_time_interval(), (0, 0))
         self.eaf.add_tier('tier1')
@@ -739,6 +813,14 @@ class Elan(unittest.TestCase):
         self.assertEqual(sorted(self.eaf.get_tier_ids_for_linguistic_type(
                                 'default-lt', 't1')), ['t4'])
 
+    def test_get_tier_intervals(self):
+        self.eaf.add_tier('tier1')
+        self.eaf.add_annotation('tier1', 500, 1000, 'b')
+        self.eaf.add_annotation('tier1', 0, 100, 'a')
+        self.assertEqual(self.eaf.get_tier_intervals('tier1'),
+                         [(0, 100), (500, 1000)])
+        self.assertRaises(KeyError, self.eaf.get_tier_intervals, 'tier2')
+
     def test_get_tier_names(self):
         self.eaf.add_tier('tier1')
         self.eaf.add_tier('tier2')
@@ -747,6 +829,102 @@ class Elan(unittest.TestCase):
         self.assertEqual(sorted(self.eaf.get_tier_names()),
                          ['default', 'tier1', 'tier2', 'tier3', 'tier4'])
 
+    def test_intersect_tiers(self):
+        self.eaf.add_tier('tier1')
+        self.eaf.add_tier('tier2')
+        self.eaf.add_annotation('tier1', 0, 1000)
+        self.eaf.add_annotation('tier1', 1500, 2000)
+        self.eaf.add_annotation('tier2', 200, 300)
+        self.eaf.add_annotation('tier2', 900, 1600)
+        self.eaf.add_annotation('tier2', 2000, 2500)
+        self.assertEqual(self.eaf.intersect_tiers('tier1', 'tier2'),
+                         'tier1_tier2_intersection')
+        self.assertEqual(sorted(self.eaf.get_annotation_data_for_tier(
+            'tier1_tier2_intersection')),
+            [(200, 300, ''), (900, 1000, ''), (1500, 1600, '')])
+
+    def test_join_tiers(self):
+        self.eaf.add_tier('words')
+        self.eaf.add_tier('gestures')
+        self.eaf.add_annotation('words', 0, 100, 'w1')
+        self.eaf.add_annotation('words', 100, 200, 'w2')
+        self.eaf.add_annotation('words', 300, 400, 'w3')
+        self.eaf.add_annotation('gestures', 50, 150, 'g1')
+        self.eaf.add_annotation('gestures', 190, 300, 'g2')
+        self.assertEqual(list(self.eaf.join_tiers('words', 'gestures')), [
+            ((0, 100, 'w1'), (50, 150, 'g1'), 50),
+            ((100, 200, 'w2'), (50, 150, 'g1'), 50),
+            ((100, 200, 'w2'), (190, 300, 'g2'), 10)])
+        self.assertEqual(list(self.eaf.join_tiers(
+            'words', 'gestures', 'left', 20)), [
+            ((0, 100, 'w1'), (50, 150, 'g1'), 50),
+            ((100, 200, 'w2'), (50, 150, 'g1'), 50),
+            ((300, 400, 'w3'), None, 0)])
+        self.assertEqual(list(self.eaf.join_tiers(
+            'words', 'gestures', 'anti')), [((300, 400, 'w3'), None, 0)])
+        self.assertRaises(ValueError, self.eaf.join_tiers, 'words',
+                          'gestures', 'outer')
+        self.assertRaises(KeyError, self.eaf.join_tiers, 'words', 'a')
+
+    def test_get_tier_statistics(self):
+        self.eaf.add_tier('tier1')
+        self.eaf.add_tier('tier2')
+        self.eaf.add_tier('tier3', parent='tier1')
+        self.assertEqual(self.eaf.get_tier_statistics('tier1'), {
+            'annotations': 0, 'duration': 0, 'mean_duration': 0.0,
+            'min_time': None, 'max_time': None, 'covered': 0,
+            'coverage': 0.0, 'values': 0})
+        self.eaf.add_annotation('tier1', 0, 100, 'a')
+        self.eaf.add_annotation('tier1', 50, 200, 'a')
+        self.eaf.add_annotation('tier2', 300, 400, 'b')
+        self.assertEqual(self.eaf.get_tier_statistics('tier1'), {
+            'annotations': 2, 'duration': 250, 'mean_duration': 125.0,
+            'min_time': 0, 'max_time': 200, 'covered': 200,
+            'coverage': 0.5, 'values': 1})
+        self.assertIs(self.eaf.get_cached_tier_statistics('tier1'),
+                      self.eaf.get_cached_tier_statistics('tier1'))
+
+        self.eaf.add_ref_annotation('tier3', 'tier1', 10, 'r')
+        self.assertEqual(
+            self.eaf.get_tier_statistics('tier3')['annotations'], 1)
+        self.eaf.remove_annotation('tier1', 150)
+        self.assertEqual(
+            self.eaf.get_tier_statistics('tier1')['annotations'], 1)
+        self.eaf.shift_annotations(100)
+        self.assertEqual(self.eaf.get_tier_statistics('tier2')['min_time'],
+                         400)
+        self.eaf.rename_tier('tier2', 'tier4')
+        self.assertEqual(self.eaf.get_tier_statistics('tier4')['max_time'],
+                         500)
+        self.eaf.remove_all_annotations_from_tier('tier4')
+        self.assertEqual(
+            self.eaf.get_tier_statistics('tier4')['annotations'], 0)
+        self.assertRaises(KeyError, self.eaf.get_tier_statistics, 'tier2')
+        self.eaf.add_annotation('tier4', 1000, 1200)
+        self.assertEqual(self.eaf.get_tier_statistics('tier1')['coverage'],
+                         100/1100.0)
+
+        # Only the tier itself has to be readable
+        eaf = Eaf('./test/sample_2.8.eaf')
+        stats = eaf.get_tier_statistics('text')
+        self.assertEqual(stats['annotations'],
+                         len(eaf.get_annotation_data_for_tier('text')))
+        self.assertTrue(0 < stats['coverage'] <= 1)
+        self.assertEqual(list(eaf.tier_statistics), ['text'])
+
+    def test_invalidate_tier(self):
+        self.eaf.add_tier('tier1')
+        self.eaf.add_annotation('tier1', 0, 100, 'a')
+        self.assertEqual(
+            self.eaf.get_tier_statistics('tier1')['annotations'], 1)
+        aid = list(self.eaf.tiers['tier1'][0])[0]
+        self.eaf.timeslots[self.eaf.tiers['tier1'][0][aid][1]] = 300
+        self.assertEqual(self.eaf.get_tier_statistics('tier1')['duration'],
+                         100)
+        self.eaf.invalidate_tier('tier1')
+        self.assertEqual(self.eaf.get_tier_statistics('tier1')['duration'],
+                         300)
+
     def test_merge_tiers(self):
         self.eaf.add_tier('tier1')
         self.eaf.add_tier('tier2')
@@ -1019,6 +1197,10 @@ class Elan(unittest.TestCase):
         self.assertEqual(sorted(self.eaf.get_tier_names()),
                          ['default', 'tier2', 'tier3', 'tier4'])
         self.assertRaises(KeyError, self.eaf.remove_tier, 'tier1')
+        self.eaf.get_tier_statistics('tier2')
+        self.eaf.remove_tier('tier2')
+        self.assertNotIn('tier2', self.eaf.tier_statistics)
+        self.assertNotIn('tier2', self.eaf.tier_versions)
 
     def test_remove_tiers(self):
         self.eaf.add_tier('tier1')
@@ -1043,6 +1225,52 @@ class Elan(unittest.TestCase):
             'child', 'test1a', 'test2', 'test3', 'test4', 'test5']))
         self.assertEqual(sorted(self.eaf.child_tiers_for('test5')),
                          sorted(['child']))
+        self.eaf.get_tier_statistics('test2')
+        self.eaf.rename_tier('test2', 'test2a')
+        self.assertNotIn('test2', self.eaf.tier_statistics)
+        self.assertNotIn('test2', self.eaf.tier_versions)
+
+    def test_snap_boundaries(self):
+        self.eaf.add_tier('tier1')
+        self.eaf.add_tier('ref')
+        self.eaf.add_annotation('ref', 0, 1000)
+        self.eaf.add_annotation('ref', 1000, 1010)
+        self.eaf.add_annotation('ref', 2000, 3000)
+        self.eaf.add_annotation('tier1', 5, 995, 'a')
+        self.eaf.add_annotation('tier1', 1003, 1008, 'b')
+        self.eaf.add_annotation('tier1', 1990, 2500, 'c')
+        self.eaf.get_cached_tier_statistics('tier1')
+        self.assertEqual(self.eaf.snap_boundaries('tier1', 'ref', 10), 5)
+        self.assertEqual(sorted(self.eaf.get_annotation_data_for_tier(
+            'tier1')), [(0, 1000, 'a'), (1000, 1010, 'b'), (2000, 2500, 'c')])
+        self.assertEqual(
+            self.eaf.get_cached_tier_statistics('tier1')['min_time'], 0)
+        self.assertEqual(self.eaf.snap_boundaries('tier1', 'ref', 10), 0)
+
+        self.eaf.add_tier('tier2')
+        self.eaf.add_annotation('tier2', 2990, 2995)
+        self.assertEqual(self.eaf.snap_boundaries('tier2', 'ref', 10), 1)
+        self.assertEqual(self.eaf.get_annotation_data_for_tier('tier2'),
+                         [(2990, 3000, '')])
+        self.assertRaises(KeyError, self.eaf.snap_boundaries, 'a', 'ref', 1)
+
+        # A timeslot shared with another tier is not snapped if that would
+        # collapse the annotation on the other tier.
+        self.eaf.add_tier('tier3')
+        self.eaf.add_tier('tier4')
+        self.eaf.add_annotation('tier3', 2200, 2995, 'd')
+        self.eaf.add_annotation('tier4', 2200, 2998, 'e')
+        aid3, = self.eaf.tiers['tier3'][0]
+        aid4, = self.eaf.tiers['tier4'][0]
+        begin, end, value, svg = self.eaf.tiers['tier4'][0][aid4]
+        self.eaf.tiers['tier4'][0][aid4] = (
+            self.eaf.tiers['tier3'][0][aid3][1], end, value, svg)
+        self.assertEqual(self.eaf.snap_boundaries('tier3', 'ref', 10), 0)
+        self.assertEqual(self.eaf.get_annotation_data_for_tier('tier4'),
+                         [(2995, 2998, 'e')])
+        self.assertEqual(self.eaf.snap_boundaries('tier3', 'ref', 300), 1)
+        self.assertEqual(self.eaf.get_annotation_data_for_tier('tier3'),
+                         [(2000, 2995, 'd')])
 
     def test_shift_annotations(self):
         self.eaf.add_tier('tier1')
@@ -1066,6 +1294,44 @@ class Elan(unittest.TestCase):
         self.assertEqual(self.eaf.shift_annotations(-200),
                          ([('tier2', 100, 250, 'b1')],
                           [('tier1', 100, 200, 'a1')]))
+        # The begin of a squashed annotation is clipped to zero and its end
+        # is shifted as well
+        self.assertEqual(
+            sorted(self.eaf.get_annotation_data_for_tier('tier2')),
+            [(0, 50, 'b1'), (400, 1400, 'b1')])
+
+        # Shared timeslots are shifted once
+        self.eaf.add_tier('tier3')
+        self.eaf.add_annotation('tier3', 0, 100, 'c1')
+        begin = list(self.eaf.tiers['tier3'][0].values())[0][1]
+        aid = self.eaf.generate_annotation_id()
+        self.eaf.tiers['tier3'][0][aid] = (
+            begin, self.eaf.generate_ts_id(200), 'c2', None)
+        self.eaf.annotations[aid] = 'tier3'
+        self.eaf.shift_annotations(10)
+        self.assertEqual(
+            sorted(self.eaf.get_annotation_data_for_tier('tier3')),
+            [(10, 110, 'c1'), (110, 210, 'c2')])
+
+    @unittest.skipIf(numpy is None, 'numpy is not available')
+    def test_to_frames(self):
+        self.eaf.add_tier('spk1')
+        self.eaf.add_tier('spk2')
+        self.eaf.add_annotation('spk1', 0, 20, 'a')
+        self.eaf.add_annotation('spk1', 20, 35, 'b')
+        self.eaf.add_annotation('spk2', 10, 50, 'a')
+        matrix, vocabulary = self.eaf.to_frames(['spk1', 'spk2'])
+        self.assertEqual(vocabulary, [None, 'a', 'b'])
+        self.assertEqual(matrix.tolist(),
+                         [[1, 0], [1, 1], [2, 1], [2, 1], [0, 1]])
+        matrix, vocabulary = self.eaf.to_frames(['spk2', 'spk1'], 20, True,
+                                                end=60)
+        self.assertEqual(vocabulary, None)
+        self.assertEqual(matrix.tolist(),
+                         [[False, True], [True, True], [True, False]])
+        self.assertEqual(self.eaf.to_frames(hop=10)[0].shape, (5, 3))
+        self.assertRaises(KeyError, self.eaf.to_frames, ['spk3'])
+        self.assertRaises(ValueError, self.eaf.to_frames, hop=0)
 
     def test_to_textgrid(self):
         self.eaf.remove_tier('default')
@@ -1124,6 +1390,84 @@ class Elan(unittest.TestCase):
                          [(0.0, 0.1, 'a11'), (0.1, 0.2, 'a21'),
                           (0.2, 0.3, 'a31'), (0.3, 0.4, 'a41')])
         self.assertEqual(list(tg.get_tier('t7').get_intervals()), [])
+        # Overlapping annotations
+        self.eaf.add_annotation('t7', 0, 300, 'o1')
+        self.eaf.add_annotation('t7', 100, 200, 'o2')
+        self.eaf.add_annotation('t7', 150, 400, 'o3')
+        self.eaf.add_annotation('t7', 300, 350, 'o4')
+        self.eaf.add_annotation('t7', 350, 500, 'o5')
+        tg = self.eaf.to_textgrid(filtin=['t7'])
+        self.assertEqual([(t.name, t.intervals) for t in tg.tiers],
+                         [('t7', [(0, 0.3, 'o1'), (0.3, 0.35, 'o4'),
+                                  (0.35, 0.5, 'o5')]),
+                          ('t7_1', [(0.1, 0.2, 'o2')]),
+                          ('t7_2', [(0.15, 0.4, 'o3')])])
+        tg = self.eaf.to_textgrid(filtin=['t7'], overlaps='skip')
+        self.assertEqual([(t.name, t.intervals) for t in tg.tiers],
+                         [('t7', [(0, 0.3, 'o1'), (0.3, 0.35, 'o4'),
+                                  (0.35, 0.5, 'o5')])])
+        self.assertRaises(ValueError, self.eaf.to_textgrid, overlaps='raise')
+        self.assertRaises(ValueError, self.eaf.to_textgrid, overlaps='x')
+
+    def test_union_tiers(self):
+        self.eaf.add_tier('tier1')
+        self.eaf.add_tier('tier2')
+        self.eaf.add_annotation('tier1', 0, 1000)
+        self.eaf.add_annotation('tier1', 1500, 2000)
+        self.eaf.add_annotation('tier2', 200, 300)
+        self.eaf.add_annotation('tier2', 900, 1600)
+        self.eaf.add_annotation('tier2', 3000, 3500)
+        self.assertEqual(self.eaf.union_tiers('tier1', 'tier2', value='u'),
+                         'tier1_tier2_union')
+        self.assertEqual(sorted(self.eaf.get_annotation_data_for_tier(
+            'tier1_tier2_union')), [(0, 2000, 'u'), (3000, 3500, 'u')])
+
+    def test_validate(self):
+        self.assertEqual(self.eaf.validate(), [])
+        self.eaf.add_linguistic_type('sub', 'Time_Subdivision')
+        self.eaf.add_linguistic_type('inc', 'Included_In')
+        self.eaf.add_linguistic_type('ass', 'Symbolic_Association', False)
+        self.eaf.add_linguistic_type('sym', 'Symbolic_Subdivision', False)
+        self.eaf.add_tier('p')
+        self.eaf.add_annotation('p', 0, 1000)
+        self.eaf.add_annotation('p', 2000, 3000)
+        self.eaf.add_tier('sub', 'sub', 'p')
+        self.eaf.add_annotation('sub', 0, 500)
+        self.eaf.add_annotation('sub', 500, 1000)
+        self.eaf.add_tier('inc', 'inc', 'p')
+        self.eaf.add_annotation('inc', 100, 200)
+        self.eaf.add_annotation('inc', 2500, 2600)
+        self.eaf.add_tier('ass', 'ass', 'p')
+        self.eaf.add_ref_annotation('ass', 'p', 500, 'a')
+        self.eaf.add_tier('sym', 'sym', 'p')
+        self.eaf.add_ref_annotation('sym', 'p', 500, 'a')
+        first = list(self.eaf.tiers['sym'][1])[0]
+        self.eaf.add_ref_annotation('sym', 'p', 500, 'b', first)
+        self.assertEqual(self.eaf.validate(), [])
+
+        self.eaf.add_annotation('sub', 2000, 2600)
+        self.eaf.add_annotation('inc', 900, 1100)
+        self.eaf.add_annotation('inc', 150, 160)
+        self.eaf.add_ref_annotation('ass', 'p', 600, 'b')
+        self.eaf.add_ref_annotation('sym', 'p', 500, 'c')
+        problems = self.eaf.validate()
+        self.assertEqual([(t, m) for t, _, m in problems], [
+            ('ass', 'Multiple annotations associated with a2'),
+            ('inc', 'Not within a parent annotation'),
+            ('inc', 'Overlaps with a6'),
+            ('sub', 'Subdivision of a3 has gaps'),
+            ('sym', 'Previous annotation chain of a2 is broken')])
+
+        eaf = Eaf()
+        eaf.add_tier('t')
+        eaf.add_annotation('t', 0, 100)
+        eaf.tiers['t'][1]['r1'] = ('a9', '', None, None)
+        eaf.tiers['t'][0]['a1'] = ('ts9', 'ts1', '', None)
+        eaf.tiers['t'][2]['PARENT_REF'] = 'x'
+        self.assertEqual(eaf.validate(), [
+            ('t', None, 'Parent tier x does not exist'),
+            ('t', 'a1', 'Timeslot does not exist'),
+            ('t', 'r1', 'Referenced annotation does not exist')])
 
     #def test_to_file_to_eaf(self):
     #    x, filepath = tempfile.mkstemp()
@@ -1150,8 +1494,60 @@ class Elan(unittest.TestCase):
     def test_parse_eaf(self):
         pass
 
+    def test_parse_eaf_tiers(self):
+        eaf = Eaf('./test/sample_2.8.eaf', tiers=['text'])
+        self.assertEqual(list(eaf.get_tier_names()), ['text'])
+        self.assertEqual(len(eaf.get_annotation_data_for_tier('text')),
+                         len(Eaf('./test/sample_2.8.eaf')
+                             .get_annotation_data_for_tier('text')))
+
     def test_eaf_from_chat(self):
-        pass
+        chat = u'\n'.join([
+            u'@UTF8', u'@Begin', u'@Languages:\teng',
+            u'@Participants:\tCHI Anne Target_Child, MOT Mother',
+            u'@ID:\teng|corpus|CHI|2;6.|female|||Target_Child|||',
+            u'@ID:\teng|corpus|MOT|||||Mother|||',
+            u'@Media:\tanne, audio', u'@Transcriber:\tBob',
+            u'*CHI:\tmore juice: please ? \x150_1500\x15',
+            u'%mor:\tqn|more n|juice', u'%com:\tpoints',
+            u'*MOT:\tno \u00fc', u'%com:\tuntimed',
+            u'*MOT:\tyou want', u'\tmore ? \x151500_3000\x15',
+            u'@End', u''])
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'anne.cha')
+        with open(path, 'wb') as f:
+            f.write(chat.encode('utf-8'))
+        eaf = eaf_from_chat(path)
+        self.assertEqual(sorted(eaf.get_tier_names()),
+                         ['CHI', 'CHI_com', 'CHI_mor', 'MOT', 'default'])
+        self.assertEqual(eaf.get_annotation_data_for_tier('CHI'),
+                         [(0, 1500, 'more juice: please ?')])
+        self.assertEqual(eaf.get_annotation_data_for_tier('MOT'),
+                         [(1500, 3000, 'you want more ?')])
+        self.assertEqual(eaf.get_annotation_data_for_tier('CHI_mor'),
+                         [(0, 1500, 'qn|more n|juice',
+                           'more juice: please ?')])
+        self.assertEqual(eaf.get_parameters_for_tier('CHI')['PARTICIPANT'],
+                         'Anne')
+        self.assertEqual(eaf.get_parameters_for_tier('MOT')['ANNOTATOR'],
+                         'Bob')
+        self.assertEqual(eaf.get_linked_files()[0]['MEDIA_URL'],
+                         'file://anne.wav')
+        self.assertEqual(eaf.validate(), [])
+
+        broken = os.path.join(directory, 'broken.cha')
+        with open(broken, 'wb') as f:
+            f.write(chat.encode('utf-8')[:-6])
+        self.assertRaises(ValueError, eaf_from_chat, broken)
+
+        out = os.path.join(directory, 'out')
+        os.mkdir(out)
+        paths, errors = batch_eaf_from_chat([path], out, processes=1)
+        self.assertEqual(paths, [os.path.join(out, 'anne.eaf')])
+        self.assertEqual(errors, [])
+        self.assertEqual(Eaf(paths[0]).get_annotation_data_for_tier('CHI'),
+                         [(0, 1500, 'more juice: please ?')])
+        shutil.rmtree(directory)
 
 if __name__ == '__main__':
     unittest.main()
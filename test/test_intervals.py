@@ -0,0 +1,78 @@
+#!/bin/env python
+# -*- coding: utf-8 -*-
+
+from pympi import Intervals
+import unittest
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class IntervalsTest(unittest.TestCase):
+    def test_merge(self):
+        self.assertEqual(Intervals.merge([]), [])
+        self.assertEqual(Intervals.merge([(0, 1), (1, 2), (3, 5), (4, 4.5)]),
+                         [(0, 2), (3, 5)])
+
+    def test_union(self):
+        self.assertEqual(Intervals.union([(0, 1), (5, 6)], [(0.5, 2)]),
+                         [(0, 2), (5, 6)])
+        self.assertEqual(Intervals.union([], [(1, 2)]), [(1, 2)])
+
+    def test_intersection(self):
+        self.assertEqual(Intervals.intersection([(0, 10)], [(1, 2), (3, 4)]),
+                         [(1, 2), (3, 4)])
+        self.assertEqual(Intervals.intersection([(0, 1)], [(1, 2)]), [])
+
+    def test_difference(self):
+        self.assertEqual(Intervals.difference([(0, 10)], [(1, 2), (3, 4)]),
+                         [(0, 1), (2, 3), (4, 10)])
+        self.assertEqual(Intervals.difference([(1, 2)], [(0, 10)]), [])
+        self.assertEqual(Intervals.difference([(1, 2), (5, 6)], []),
+                         [(1, 2), (5, 6)])
+
+    def test_complement(self):
+        self.assertEqual(Intervals.complement([(1, 2)], 0, 3),
+                         [(0, 1), (2, 3)])
+        self.assertEqual(Intervals.complement([], 0, 3), [(0, 3)])
+        self.assertEqual(Intervals.complement([], 3, 3), [])
+
+    def test_join(self):
+        a = [(0, 10, 'long'), (1, 2, 'short')]
+        b = [(1.5, 3, 'x'), (9, 12, 'y')]
+        self.assertEqual(list(Intervals.join(a, b)), [
+            ((0, 10, 'long'), (1.5, 3, 'x'), 1.5),
+            ((0, 10, 'long'), (9, 12, 'y'), 1),
+            ((1, 2, 'short'), (1.5, 3, 'x'), 0.5)])
+        self.assertEqual(list(Intervals.join(a, b, 'anti', 1)),
+                         [((1, 2, 'short'), None, 0)])
+        self.assertRaises(ValueError, Intervals.join, a, b, 'outer')
+
+        # Ended intervals are evicted and the pairs stay in order of b
+        a = [(0, 1), (5, 6), (20, 21)]
+        b = [(0, 30), (0.5, 5.5), (5, 5.25)]
+        self.assertEqual([(x, y) for x, y, _ in Intervals.join(a, b)], [
+            ((0, 1), (0, 30)), ((0, 1), (0.5, 5.5)), ((5, 6), (0, 30)),
+            ((5, 6), (0.5, 5.5)), ((5, 6), (5, 5.25)), ((20, 21), (0, 30))])
+
+    @unittest.skipIf(numpy is None, 'numpy is not available')
+    def test_frames(self):
+        matrix, vocabulary = Intervals.frames(
+            [[(0, 20, 'a'), (20, 30, 'b')], [(10, 40, 'c')]], 0, 40, 10)
+        self.assertEqual(vocabulary, [None, 'a', 'b', 'c'])
+        self.assertEqual(matrix.tolist(), [[1, 0], [1, 3], [2, 3], [0, 3]])
+        # Nested intervals fall back to the enclosing interval
+        tiers = [[(0, 100, 'a'), (10, 20, 'b'), (30, 50, 'c'), (35, 40, 'd')]]
+        matrix, _ = Intervals.frames(tiers, 0, 60, 10)
+        self.assertEqual(matrix[:, 0].tolist(), [1, 2, 1, 3, 3, 1])
+        matrix, _ = Intervals.frames(tiers, 0, 120, 5, True)
+        self.assertEqual(matrix[:, 0].tolist(), [True]*20 + [False]*4)
+        self.assertEqual(
+            (Intervals.frames(tiers, 0, 120, 5)[0][:, 0] > 0).tolist(),
+            matrix[:, 0].tolist())
+        self.assertRaises(ValueError, Intervals.frames, tiers, 0, 1, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,7 +4,11 @@
 import unittest
 import tempfile
 import os
-from pympi.Praat import TextGrid
+from pympi.Praat import TextGrid, TextGridWriter, iter_textgrid
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class PraatTest(unittest.TestCase):
@@ -112,6 +116,59 @@ class PraatTest(unittest.TestCase):
         self.assertEqual(['tier1', 'tier2a', 'tier3'],
                          [a.name for a in self.tg.tiers])
 
+    def test_tier_index(self):
+        a1 = self.tg.add_tier('a')
+        b = self.tg.add_tier('b')
+        a2 = self.tg.add_tier('a', number=1)
+        self.assertEqual(self.tg.get_tiers_by_name('a'), [a2, a1])
+        self.assertIs(self.tg.get_tier('a'), a2)
+        self.assertEqual(self.tg.get_tiers_by_name('c'), [])
+
+        self.tg.change_tier_name(1, 'c')
+        self.assertIs(self.tg.get_tier('a'), a1)
+        self.assertIs(self.tg.get_tier('c'), a2)
+        self.tg.remove_tier(2)
+        self.assertRaises(IndexError, self.tg.get_tier, 'a')
+        self.tg.sort_tiers(key=lambda x: x.name)
+        self.assertEqual(self.tg.tiers, [b, a2])
+        self.assertIs(self.tg.get_tier(2), a2)
+
+        # Renaming a tier updates the index of its TextGrid only
+        other = TextGrid(xmax=1)
+        other_b = other.add_tier('b')
+        b.name = 'd'
+        self.assertIs(self.tg.get_tier('d'), b)
+        self.assertRaises(IndexError, self.tg.get_tier, 'b')
+        self.assertIs(other.get_tier('b'), other_b)
+
+        # Direct changes of the tiers list need a rebuild of the index
+        self.tg.tiers.append(a1)
+        self.tg.index_tiers()
+        self.assertIs(self.tg.get_tier('a'), a1)
+        self.tg.remove_tier('c')
+        self.assertEqual(self.tg.tiers, [b, a1])
+        self.assertIs(a2.grid, None)
+        self.tg.tiers[0] = a2
+        self.tg.index_tiers()
+        self.assertRaises(IndexError, self.tg.get_tier, 'd')
+        self.assertIs(self.tg.get_tier('c'), a2)
+        self.tg.tiers = [b]
+        self.tg.index_tiers()
+        self.assertEqual(self.tg.get_tiers_by_name('a'), [])
+        self.assertIs(self.tg.get_tier('d'), b)
+
+        # The index is kept up to date without rebuilding it
+        self.tg.index_tiers()
+        self.tg.index_tiers = lambda: self.fail('Index is rebuilt')
+        a3 = self.tg.add_tier('a')
+        a4 = self.tg.add_tier('a', number=2)
+        self.tg.change_tier_name(1, 'a')
+        self.assertRaises(IndexError, self.tg.get_tier, 'x')
+        self.assertEqual(self.tg.get_tiers_by_name('a'), [b, a4, a3])
+        self.tg.remove_tier(2)
+        self.assertEqual(self.tg.tier_index, {'a': [0, 1]})
+        self.assertEqual(self.tg.get_tiers_by_name('a'), [b, a3])
+
     def test_get_tiers(self):
         self.tg.add_tier('tier1')
         self.tg.add_tier('tier2')
@@ -158,6 +215,168 @@ class PraatTest(unittest.TestCase):
 
             os.remove(tempf)
 
+    def test_from_file(self):
+        tier1 = self.tg.add_tier('tier1')
+        text = u'a "quoted"\nü\u9000\U0001f600'
+        tier1.add_interval(1, 2.5, text)
+        tier1.add_interval(3, 4, '')
+        tier2 = self.tg.add_tier('tier2', tier_type='TextTier')
+        tier2.add_point(1e-05, 'p')
+        tempf = tempfile.mkstemp()[1]
+        for mode in ['normal', 'short', 'chronological', 'binary']:
+            self.tg.to_file(tempf, mode=mode)
+            tg = TextGrid(tempf)
+            self.assertEqual((tg.xmin, tg.xmax, tg.tier_num), (0, 20, 2))
+            self.assertEqual([t.name for t in tg.tiers], ['tier1', 'tier2'])
+            self.assertEqual(tg.tiers[0].intervals, [
+                (0, 1, ''), (1, 2.5, text), (2.5, 3, ''),
+                (3, 4, ''), (4, 20, '')])
+            self.assertEqual(tg.tiers[1].intervals, [(1e-05, 'p')])
+
+        with open(tempf, 'wb') as f:
+            f.write(u'''File type = "ooTextFile" Object class = "TextGrid"
+xmin = 0 xmax = 2.5 tiers? <exists> size = 1 ! one tier
+item []: item [1]: class = "IntervalTier" name = "t 1"
+xmin = 0 xmax = 2.5 intervals: size = 2
+intervals [1]: xmin = 0 xmax = 1.5E0 text = "x ""y""
+z"
+intervals [2]: xmin = 1.5 xmax = 2.5 text = "3"'''.encode('utf-16'))
+        tg = TextGrid(tempf)
+        self.assertEqual(tg.tiers[0].name, 't 1')
+        self.assertEqual(tg.tiers[0].intervals,
+                         [(0, 1.5, 'x "y"\nz'), (1.5, 2.5, '3')])
+        os.remove(tempf)
+
+    def test_iter_textgrid(self):
+        tier1 = self.tg.add_tier('tier1')
+        tier1.add_interval(1, 2.5, u'a "quoted"\n""ü')
+        tier1.add_interval(3, 4, 'b')
+        tier2 = self.tg.add_tier('tier2', tier_type='TextTier')
+        tier2.add_point(1, 'p')
+        expected = [('tier1', 'IntervalTier', 0, 1, ''),
+                    ('tier1', 'IntervalTier', 1, 2.5, u'a "quoted"\n""ü'),
+                    ('tier1', 'IntervalTier', 2.5, 3, ''),
+                    ('tier1', 'IntervalTier', 3, 4, 'b'),
+                    ('tier1', 'IntervalTier', 4, 20, ''),
+                    ('tier2', 'TextTier', 1, 1, 'p')]
+        tempf = tempfile.mkstemp()[1]
+        for mode in ['normal', 'short', 'binary']:
+            for codec in ['utf-8', 'utf-16']:
+                self.tg.to_file(tempf, codec, mode)
+                for chunk_size in [1, 7, 1 << 20]:
+                    self.assertEqual(list(iter_textgrid(
+                        tempf, codec, chunk_size=chunk_size)), expected)
+            self.assertEqual(list(iter_textgrid(tempf, tiers=['tier2'])),
+                             expected[-1:])
+        self.tg.to_file(tempf, mode='chronological')
+        self.assertEqual(list(iter_textgrid(tempf)),
+                         sorted(expected, key=lambda x: x[2]))
+        os.remove(tempf)
+
+    def test_textgrid_writer(self):
+        tier1 = self.tg.add_tier('tier1')
+        tier1.add_interval(1, 2.5, u'a "quoted"\nü')
+        tier1.add_interval(3, 4, 'b\0c')
+        self.tg.add_tier('tier\0' + '2')
+        tier3 = self.tg.add_tier('tier3', tier_type='TextTier')
+        tier3.add_point(1, 'p')
+        tier3.add_point(2, 'q')
+        tempf = tempfile.mkstemp()[1]
+        # Null characters in names and texts are written as is
+        for mode in ['normal', 'short', 'binary']:
+            for codec in ['utf-8', 'utf-16']:
+                with TextGridWriter(tempf, 0, 20, codec, mode) as writer:
+                    for tier in self.tg.tiers:
+                        writer.add_tier(tier.name, tier.tier_type)
+                        for interval in tier.intervals:
+                            if tier.tier_type == 'TextTier':
+                                writer.add_point(*interval)
+                            else:
+                                writer.add_interval(*interval)
+                tg = TextGrid(tempf, codec=codec)
+                self.assertEqual(tg.tier_num, 3)
+                self.assertEqual(
+                    [(t.name, t.tier_type, t.xmin, t.xmax, t.intervals)
+                     for t in tg.tiers],
+                    [(t.name, t.tier_type, t.xmin, t.xmax,
+                      t.get_all_intervals()) for t in self.tg.tiers])
+
+        writer = TextGridWriter(tempf, 0, 20)
+        self.assertRaises(Exception, writer.add_interval, 1, 2, 'a')
+        self.assertRaises(Exception, writer.add_tier, 'a', 'b')
+        writer.add_tier('a')
+        writer.add_interval(1, 2, 'a')
+        self.assertRaises(Exception, writer.add_interval, 1.5, 3, 'a')
+        self.assertRaises(Exception, writer.add_interval, 4, 3, 'a')
+        self.assertRaises(Exception, writer.add_point, 4, 'a')
+        writer.add_tier('b', 'TextTier')
+        writer.add_point(1, 'a')
+        self.assertRaises(Exception, writer.add_point, 1, 'a')
+        writer.close()
+        writer.close()
+        self.assertEqual([t.intervals for t in TextGrid(tempf).tiers],
+                         [[(0, 1, ''), (1, 2, 'a'), (2, 20, '')],
+                          [(1, 'a')]])
+        self.assertRaises(Exception, TextGridWriter, tempf, 0, 1, mode='x')
+        os.remove(tempf)
+
+    def test_lazy(self):
+        tier1 = self.tg.add_tier('tier1')
+        tier1.add_interval(1, 2.5, u'a "quoted"\nü')
+        tier2 = self.tg.add_tier('tier2', tier_type='TextTier')
+        tier2.add_point(1, 'p')
+        tier2.add_point(2, 'q')
+        tempf = tempfile.mkstemp()[1]
+        index = tempf + '.idx'
+        for mode, codec in [('normal', 'utf-8'), ('binary', 'utf-8'),
+                            ('short', 'utf-8'), ('normal', 'utf-16')]:
+            self.tg.to_file(tempf, codec, mode)
+            tg = TextGrid(tempf, codec=codec, lazy=True)
+            lazy = mode in ('normal', 'binary') and codec == 'utf-8'
+            self.assertEqual([t.source is not None for t in tg.tiers],
+                             [lazy, lazy])
+            self.assertEqual(tg.get_tier('tier2').intervals,
+                             [(1, 'p'), (2, 'q')])
+            self.assertEqual(tg.get_tier('tier2').source, None)
+            self.assertEqual((tg.xmin, tg.xmax, tg.tier_num), (0, 20, 2))
+            self.assertEqual(tg.get_tier('tier1').get_all_intervals(),
+                             tier1.get_all_intervals())
+
+        tg = TextGrid(tempf, codec='utf-16', index_path=index)
+        self.assertFalse(os.path.exists(index))
+        for mode in ['binary', 'normal']:
+            self.tg.to_file(tempf, mode=mode)
+            mtime = os.path.getmtime(tempf) + 10
+            os.utime(tempf, (mtime, mtime))
+            TextGrid(tempf, index_path=index)
+            with open(tempf, 'rb') as f:
+                data = f.read()
+            # The index is used as long as the size and time match
+            with open(tempf, 'wb') as f:
+                f.write(b' '*len(data))
+            os.utime(tempf, (mtime, mtime))
+            self.assertEqual(TextGrid(tempf, index_path=index).tier_num, 2)
+            with open(tempf, 'wb') as f:
+                f.write(data)
+            os.utime(tempf, (mtime, mtime))
+            tg = TextGrid(tempf, index_path=index)
+            self.assertEqual(tg.get_tier('tier1').intervals,
+                             [(0, 1, ''), (1, 2.5, u'a "quoted"\nü'),
+                              (2.5, 20, '')])
+        os.remove(index)
+
+        # Saving a lazy TextGrid over its own file keeps the data
+        for mode in ['normal', 'binary']:
+            self.tg.to_file(tempf, mode=mode)
+            tg = TextGrid(tempf, lazy=True)
+            tg.change_tier_name('tier2', 'tier3')
+            tg.to_file(tempf, mode=mode)
+            tg = TextGrid(tempf)
+            self.assertEqual([(t.name, t.intervals) for t in tg.tiers],
+                             [('tier1', tier1.get_all_intervals()),
+                              ('tier3', tier2.intervals)])
+        os.remove(tempf)
+
     def test_to_eaf(self):
         tier1 = self.tg.add_tier('tier1')
         tier2 = self.tg.add_tier('tier2', tier_type='TextTier')
@@ -179,6 +398,92 @@ class PraatTest(unittest.TestCase):
                                  (1500, 1530, 'point1'),
                                  (3500, 3530, 'point3')]))
 
+        tier1.add_interval(1, 2, 'int4')
+        eaf = self.tg.to_eaf()
+        self.assertEqual(len(eaf.timeslots), 8+6)
+        self.assertEqual(sorted(eaf.get_annotation_data_for_tier('tier1')),
+                         [(0, 1000, 'int1'), (1000, 2000, 'int4'),
+                          (2000, 3000, 'int2'), (5000, 6000, 'int3')])
+
+        # Contiguous intervals share a timeslot when asked for
+        eaf = self.tg.to_eaf(share_timeslots=True)
+        self.assertEqual(len(eaf.timeslots), 6+6)
+        self.assertEqual(sorted(eaf.get_annotation_data_for_tier('tier1')),
+                         [(0, 1000, 'int1'), (1000, 2000, 'int4'),
+                          (2000, 3000, 'int2'), (5000, 6000, 'int3')])
+        eaf.shift_annotations(500)
+        self.assertEqual(sorted(eaf.get_annotation_data_for_tier('tier1'))[:2],
+                         [(500, 1500, 'int1'), (1500, 2500, 'int4')])
+        eaf.add_annotation('tier1', 7000, 8000)
+        self.assertEqual(len(eaf.annotations), 8)
+        self.assertEqual(len(eaf.get_annotation_data_for_tier('tier1')), 5)
+        tier1.add_interval(7, 7.0001, 'int5')
+        self.assertRaises(ValueError, self.tg.to_eaf)
+
+    @unittest.skipIf(numpy is None, 'numpy is not available')
+    def test_to_frames(self):
+        self.tg = TextGrid(xmax=1)
+        tier1 = self.tg.add_tier('tier1')
+        tier1.add_interval(0, 0.25, 'a')
+        tier1.add_interval(0.25, 0.5, '')
+        tier1.add_interval(0.5, 1, 'b')
+        tier2 = self.tg.add_tier('tier2')
+        tier2.add_interval(0.25, 0.75, 'b')
+        matrix, vocabulary = self.tg.to_frames(hop=0.25)
+        self.assertEqual(vocabulary, [None, 'a', 'b'])
+        self.assertEqual(matrix.tolist(), [[1, 0], [0, 2], [2, 2], [2, 0]])
+        matrix, _ = self.tg.to_frames(['tier2'], 0.5, True)
+        self.assertEqual(matrix.tolist(), [[False], [True]])
+        self.tg.add_tier('tier3', 'TextTier')
+        self.assertRaises(Exception, self.tg.to_frames)
+
+    @unittest.skipIf(numpy is None, 'numpy is not available')
+    def test_to_numpy(self):
+        tier1 = self.tg.add_tier('tier1')
+        tier1.add_interval(2, 3, 'b')
+        tier1.add_interval(0, 1, 'a')
+        tier1.add_interval(1, 2, 'b')
+        tier2 = self.tg.add_tier('tier2', 'TextTier')
+        tier2.add_point(1.5, u'ü')
+        arrays1, arrays2 = self.tg.to_numpy()
+        self.assertEqual(arrays1['xmin'].tolist(), [0, 1, 2])
+        self.assertEqual(arrays1['xmax'].tolist(), [1, 2, 3])
+        self.assertEqual(arrays1['labels'].tolist(), [0, 1, 1])
+        self.assertEqual(arrays1['vocabulary'], ['a', 'b'])
+        self.assertEqual(arrays1['xmin'].dtype, numpy.float64)
+        self.assertEqual(arrays2['time'].tolist(), [1.5])
+        self.assertEqual(arrays2['vocabulary'], [u'ü'])
+        self.assertEqual(self.tg.to_numpy(['tier2'])[0]['labels'].tolist(),
+                         [0])
+        empty = self.tg.add_tier('tier3').to_numpy()
+        self.assertEqual((empty['xmin'].tolist(), empty['labels'].tolist(),
+                          empty['vocabulary']), ([], [], []))
+
+        tg = TextGrid(xmax=20)
+        self.assertEqual(tg.from_numpy('a', arrays1).intervals,
+                         tier1.intervals)
+        self.assertEqual(tg.from_numpy('b', arrays2, 1).intervals,
+                         tier2.intervals)
+        self.assertEqual([t.tier_type for t in tg.tiers],
+                         ['TextTier', 'IntervalTier'])
+        arrays1['labels'] = arrays1['labels'][:2]
+        self.assertRaises(ValueError, tg.from_numpy, 'c', arrays1)
+
+        # Lazy tiers give the same arrays without loading the intervals
+        tempf = tempfile.mkstemp()[1]
+        for mode in ['normal', 'binary']:
+            self.tg.to_file(tempf, mode=mode)
+            tg = TextGrid(tempf, lazy=True)
+            for tier, arrays in zip(tg.tiers, TextGrid(tempf).to_numpy()):
+                lazy = tier.to_numpy()
+                self.assertEqual(sorted(lazy), sorted(arrays))
+                for key in ['xmin', 'xmax', 'time', 'labels']:
+                    if key in arrays:
+                        self.assertEqual(lazy[key].tolist(),
+                                         arrays[key].tolist())
+                self.assertEqual(tier.source is None, mode == 'binary')
+        os.remove(tempf)
+
 # Test all the Praat.Tier functions
     def setup_tier(self):
         self.tier1 = self.tg.add_tier('tier1')
@@ -252,6 +557,57 @@ class PraatTest(unittest.TestCase):
         self.tier2.add_point(6, 'b')
         self.assertEqual([(5, 'a'), (6, 'b'), (7, 'c')],
                          sorted(self.tier2.get_intervals()))
+        self.tier2.intervals.append((1, 'd'))
+        self.assertEqual(list(self.tier2.get_intervals())[-1], (1, 'd'))
+        self.assertEqual(list(self.tier2.get_intervals(True))[0], (1, 'd'))
+
+    def test_sorted_intervals(self):
+        self.setup_tier()
+        for i in reversed(range(100)):
+            self.tier1.add_interval(i, i+1, str(i))
+            self.tier2.add_point(i, str(i))
+        self.assertEqual(self.tier1.intervals,
+                         [(i, i+1, str(i)) for i in range(100)])
+        self.assertEqual(list(self.tier2.get_intervals(True)),
+                         [(i, str(i)) for i in range(100)])
+        self.assertRaises(Exception, self.tier1.add_interval, 49.5, 49.7, 'a')
+        self.assertRaises(Exception, self.tier1.add_interval, -1, 0.5, 'a')
+        self.assertRaises(Exception, self.tier2.add_point, 99, 'a')
+        self.tier1.add_interval(100, 101, 'a')
+        self.tier1.add_interval(100, 100, 'z')
+        self.assertRaises(Exception, self.tier1.add_interval, 100, 100.5, 'a')
+        self.tier1.remove_interval(50)
+        self.assertEqual(len(self.tier1.intervals), 100)
+        self.assertEqual(self.tier1.intervals[48:50],
+                         [(48, 49, '48'), (51, 52, '51')])
+        self.tier1.add_interval(49, 51, 'new')
+        self.assertEqual(self.tier1.intervals[49], (49, 51, 'new'))
+        self.tier2.remove_point(50)
+        self.tier2.remove_point(50.5)
+        self.assertEqual(len(self.tier2.intervals), 99)
+
+    def test_time_queries(self):
+        self.setup_tier()
+        self.assertRaises(Exception, self.tier2.get_interval_at_time, 1)
+        self.assertRaises(Exception, self.tier1.get_nearest_point, 1)
+        self.assertEqual(self.tier1.get_interval_at_time(1), None)
+        self.assertEqual(self.tier2.get_nearest_point(1), None)
+        self.tier1.add_interval(1, 2, 'a')
+        self.tier1.add_interval(2, 3, 'b')
+        self.tier1.add_interval(5, 6, 'c')
+        self.assertEqual(self.tier1.get_intervals_at_times(
+            [0, 1, 1.5, 2, 3, 5.5, 7]),
+            [None, (1, 2, 'a'), (1, 2, 'a'), (2, 3, 'b'), None, (5, 6, 'c'),
+             None])
+        self.assertEqual(self.tier1.get_intervals_between_times(1.5, 5),
+                         [(1, 2, 'a'), (2, 3, 'b')])
+        self.assertEqual(self.tier1.get_intervals_between_times(0, 10),
+                         self.tier1.intervals)
+        self.assertEqual(self.tier1.get_intervals_between_times(3, 5), [])
+        self.tier2.add_point(1, 'a')
+        self.tier2.add_point(3, 'b')
+        self.assertEqual(self.tier2.get_nearest_points([0, 1.9, 2, 2.1, 9]),
+                         [(1, 'a'), (1, 'a'), (1, 'a'), (3, 'b'), (3, 'b')])
 
     def test_clear_intervals(self):
         self.setup_tier()
@@ -267,5 +623,48 @@ class PraatTest(unittest.TestCase):
         self.tier2.clear_intervals()
         self.assertEqual([], self.tier2.intervals)
 
+    def test_get_all_intervals(self):
+        self.setup_tier()
+        self.assertEqual(self.tier1.get_all_intervals(), [(0, 20, '')])
+        self.tier1.add_interval(5, 6, 'b')
+        self.tier1.add_interval(1, 2, 'a')
+        self.tier1.add_interval(6, 20, 'c')
+        self.assertEqual(self.tier1.get_all_intervals(), [
+            (0, 1, ''), (1, 2, 'a'), (2, 5, ''), (5, 6, 'b'), (6, 20, 'c')])
+        self.tier1.remove_interval(10)
+        self.assertEqual(list(self.tier1.iter_all_intervals())[-1],
+                         (6, 20, ''))
+        self.tier2.add_point(6, 'b')
+        self.tier2.add_point(5, 'a')
+        self.assertEqual(self.tier2.get_all_intervals(), [(5, 'a'), (6, 'b')])
+
+    def test_get_time_intervals(self):
+        self.setup_tier()
+        self.assertRaises(Exception, self.tier2.get_time_intervals)
+        self.tier1.add_interval(5, 6, 'b')
+        self.tier1.add_interval(1, 2, 'a')
+        self.tier1.add_interval(2, 3, ' ')
+        self.assertEqual(self.tier1.get_time_intervals(), [(1, 2), (5, 6)])
+
+    def test_set_operations(self):
+        self.setup_tier()
+        self.tier1.add_interval(1, 5, 'a')
+        self.tier1.add_interval(5, 6, '')
+        self.tier1.add_interval(8, 10, 'b')
+        tier3 = self.tg.add_tier('tier3')
+        tier3.add_interval(4, 9, 'c')
+        self.assertEqual(self.tier1.union(tier3, value='u').intervals,
+                         [(1, 10, 'u')])
+        self.assertEqual(self.tier1.intersection(tier3).intervals,
+                         [(4, 5, ''), (8, 9, '')])
+        self.assertEqual(self.tier1.difference(tier3).intervals,
+                         [(1, 4, ''), (9, 10, '')])
+        complement = self.tier1.complement(value='c')
+        self.assertEqual(complement.name, 'tier1_complement')
+        self.assertEqual((complement.xmin, complement.xmax), (0, 20))
+        self.assertEqual(complement.intervals,
+                         [(0, 1, 'c'), (5, 8, 'c'), (10, 20, 'c')])
+        self.assertRaises(Exception, self.tier1.union, self.tier2)
+
 if __name__ == '__main__':
     unittest.main()